@@ -0,0 +1,372 @@
+"""Benchmark suite for the AVL trees.
+
+Times insert, search, delete, in-order iteration and visualize for every
+tree layout against a bisect-maintained list and a plain dict, over
+sorted, reverse-sorted, random and Zipf-skewed key streams. Results are
+written as JSON so two runs can be compared for regressions.
+
+    python AVLBenchmark.py --sizes 1000,100000 --output new.json
+    python AVLBenchmark.py --sizes 1000,100000 --baseline old.json
+
+The exit status is non-zero if a tree layout uses more memory per key
+than its budget below, or if an operation got slower than the baseline
+by more than the tolerance.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left
+from itertools import accumulate
+
+from AVLTree import AVLTree, SlottedAVLTree
+from ArrayAVLTree import ArrayAVLTree
+
+DEFAULT_SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+DISTRIBUTIONS = ("sorted", "reverse", "random", "zipf")
+OPERATIONS = ("insert", "search", "delete", "iterate", "visualize")
+ZIPF_EXPONENT = 1.1
+
+# Upper bounds on bytes/key for the random key stream: the figures quoted
+# in ArrayAVLTree's module docstring plus about 10% for allocator and
+# CPython version differences. Every layout stores key, left, right,
+# height and subtree size per node:
+#   dict-tree  ~112 measured; the five fields live in a per-node __dict__
+#   slots       ~72 measured; the same fields as __slots__, no __dict__
+#   array      ~21.5 measured; 8 + 4 + 4 + 1 + 4 bytes per slot plus
+#              the arrays' spare capacity
+BYTES_PER_KEY_BUDGET = {
+    "dict-tree": 125,
+    "slots": 80,
+    "array": 24,
+}
+
+# Beyond these sizes an operation is skipped: list insert/delete shift
+# O(n) items each, and rendering 10^6 nodes produces gigabytes of text
+MAX_SIZE = {
+    ("bisect", "insert"): 2 * 10**5,
+    ("bisect", "delete"): 2 * 10**5,
+    ("dict-tree", "visualize"): 10**5,
+    ("slots", "visualize"): 10**5,
+    ("array", "visualize"): 10**5,
+}
+MAX_QUERIES = 10**6
+
+
+class BisectList:
+    """Sorted list kept with bisect, the usual ordered-set baseline"""
+
+    def __init__(self):
+        self.keys = []
+
+    def insert(self, key):
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            keys.insert(i, key)
+
+    def delete(self, key):
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            raise KeyError(key)
+        del self.keys[i]
+
+    def __contains__(self, key):
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def __iter__(self):
+        return iter(self.keys)
+
+
+class DictSet:
+    """Plain dict baseline; iteration follows insertion order, not key order"""
+
+    def __init__(self):
+        self.keys = {}
+
+    def insert(self, key):
+        self.keys[key] = None
+
+    def delete(self, key):
+        del self.keys[key]
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __iter__(self):
+        return iter(self.keys)
+
+
+STRUCTURES = {
+    "dict-tree": AVLTree,
+    "slots": SlottedAVLTree,
+    "array": ArrayAVLTree,
+    "bisect": BisectList,
+    "dict": DictSet,
+}
+
+
+class NullWriter:
+    """File-like sink that only counts what visualize() writes"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+
+
+def counting(cls):
+    """Subclass of a tree layout that counts its rotations"""
+    class Counting(cls):
+        rotations = 0
+
+        def left_rotate(self, x):
+            self.rotations += 1
+            return super().left_rotate(x)
+
+        def right_rotate(self, y):
+            self.rotations += 1
+            return super().right_rotate(y)
+
+    return Counting
+
+
+def key_stream(distribution, n, seed):
+    rng = random.Random(seed)
+    if distribution == "sorted":
+        return list(range(n))
+    if distribution == "reverse":
+        return list(range(n - 1, -1, -1))
+    if distribution == "random":
+        return rng.sample(range(10 * n), n)
+    if distribution == "zipf":
+        # n draws over n distinct keys, rank r drawn with weight 1 / r^s;
+        # the ranks are scattered over the key space so hot keys are not adjacent
+        values = rng.sample(range(10 * n), n)
+        weights = accumulate(1 / r ** ZIPF_EXPONENT for r in range(1, n + 1))
+        return rng.choices(values, cum_weights=list(weights), k=n)
+    raise ValueError(f"unknown distribution {distribution!r}")
+
+
+def timed(func, *args):
+    """Run func once with the collector paused; return (result, seconds)"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def run_insert(structure, keys):
+    insert = structure.insert
+    for key in keys:
+        insert(key)
+
+
+def run_search(structure, queries):
+    hits = 0
+    for key in queries:
+        if key in structure:
+            hits += 1
+    return hits
+
+
+def run_delete(structure, keys):
+    delete = structure.delete
+    for key in keys:
+        delete(key)
+
+
+def run_iterate(structure):
+    count = 0
+    for _ in structure:
+        count += 1
+    return count
+
+
+def run_visualize(structure):
+    sink = NullWriter()
+    structure.visualize(file=sink)
+    return sink.chars
+
+
+def measure_memory(cls, keys, distinct):
+    """Build and tear down a counting copy of the structure under tracemalloc"""
+    is_tree = hasattr(cls, "left_rotate")
+    build_cls = counting(cls) if is_tree else cls
+    tracemalloc.start()
+    structure = build_cls()
+    run_insert(structure, keys)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = {"peak_bytes": peak, "bytes_per_key": current / max(len(distinct), 1)}
+    if is_tree:
+        stats["insert_rotations"] = structure.rotations / max(len(keys), 1)
+        structure.rotations = 0
+        run_delete(structure, distinct)
+        stats["delete_rotations"] = structure.rotations / max(len(distinct), 1)
+    return stats
+
+
+def bench_case(name, distribution, n, operations, seed, memory):
+    """All operations for one structure on one key stream"""
+    cls = STRUCTURES[name]
+    keys = key_stream(distribution, n, seed)
+    distinct = list(dict.fromkeys(keys))
+    queries = random.Random(seed + 1).choices(keys, k=min(n, MAX_QUERIES))
+    records = []
+
+    def record(op, count, seconds, **extra):
+        row = {"structure": name, "distribution": distribution, "n": n, "op": op,
+               "count": count, "seconds": seconds,
+               "ops_per_sec": count / seconds if seconds else None}
+        row.update(extra)
+        records.append(row)
+
+    def skipped(op):
+        limit = MAX_SIZE.get((name, op))
+        return limit is not None and n > limit
+
+    for op in operations:
+        if skipped(op):
+            records.append({"structure": name, "distribution": distribution, "n": n,
+                            "op": op, "skipped": f"n > {MAX_SIZE[name, op]}"})
+
+    stats = {}
+    if memory and not skipped("insert"):
+        stats = measure_memory(cls, keys, distinct)
+
+    # Structure for the read-only operations; the bisect list is built
+    # directly so that search and iteration can be measured at every size
+    if name == "bisect":
+        structure = BisectList()
+        structure.keys = sorted(distinct)
+    else:
+        structure = cls()
+        run_insert(structure, keys)
+
+    if "insert" in operations and not skipped("insert"):
+        _, seconds = timed(run_insert, cls(), keys)
+        record("insert", len(keys), seconds,
+               peak_bytes=stats.get("peak_bytes"),
+               bytes_per_key=stats.get("bytes_per_key"),
+               rotations_per_op=stats.get("insert_rotations"))
+    if "search" in operations:
+        _, seconds = timed(run_search, structure, queries)
+        record("search", len(queries), seconds)
+    if "iterate" in operations:
+        count, seconds = timed(run_iterate, structure)
+        record("iterate", count, seconds)
+    if "visualize" in operations and hasattr(structure, "visualize") and not skipped("visualize"):
+        chars, seconds = timed(run_visualize, structure)
+        record("visualize", len(distinct), seconds, chars=chars)
+    if "delete" in operations and not skipped("delete"):
+        _, seconds = timed(run_delete, structure, distinct)
+        record("delete", len(distinct), seconds,
+               rotations_per_op=stats.get("delete_rotations"))
+    return records
+
+
+def check_budgets(results):
+    """Tree layouts whose bytes/key on the random stream exceed their budget"""
+    failures = []
+    for row in results:
+        budget = BYTES_PER_KEY_BUDGET.get(row["structure"])
+        if budget is None or row["op"] != "insert" or row["distribution"] != "random":
+            continue
+        if row.get("bytes_per_key") and row["bytes_per_key"] > budget:
+            failures.append(f"{row['structure']} n={row['n']}: {row['bytes_per_key']:.1f} bytes/key "
+                            f"over budget {budget}")
+    return failures
+
+
+def compare(results, baseline, tolerance):
+    """Operations whose throughput fell more than tolerance below the baseline"""
+    def key(row):
+        return row["structure"], row["distribution"], row["n"], row["op"]
+
+    before = {key(row): row for row in baseline["results"] if row.get("ops_per_sec")}
+    regressions = []
+    for row in results:
+        old = before.get(key(row))
+        if old is None or not row.get("ops_per_sec"):
+            continue
+        if row["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{' '.join(map(str, key(row)))}: {old['ops_per_sec']:,.0f} -> "
+                               f"{row['ops_per_sec']:,.0f} ops/sec")
+    return regressions
+
+
+def parse_list(text, allowed=None, convert=str):
+    items = [convert(item) for item in text.split(",") if item]
+    if allowed is not None:
+        for item in items:
+            if item not in allowed:
+                raise argparse.ArgumentTypeError(f"{item!r} is not one of {', '.join(allowed)}")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        type=lambda s: parse_list(s, convert=lambda x: int(float(x))))
+    parser.add_argument("--distributions", default=",".join(DISTRIBUTIONS),
+                        type=lambda s: parse_list(s, DISTRIBUTIONS))
+    parser.add_argument("--structures", default=",".join(STRUCTURES),
+                        type=lambda s: parse_list(s, STRUCTURES))
+    parser.add_argument("--ops", default=",".join(OPERATIONS),
+                        type=lambda s: parse_list(s, OPERATIONS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc and rotation-counting pass")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed fractional slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.sizes:
+        for distribution in args.distributions:
+            for name in args.structures:
+                print(f"{name} {distribution} n={n}", file=sys.stderr)
+                results.extend(bench_case(name, distribution, n, args.ops, args.seed,
+                                          not args.no_memory))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failures = check_budgets(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
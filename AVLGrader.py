@@ -0,0 +1,208 @@
+"""Headless grading of AVL quiz submissions.
+
+A submission is the insertion sequence of a question plus where the
+student put each key, either as a slot -> key map or as (key, x, y)
+drop coordinates on the quiz canvas. Slots are named by their path from
+the root: "" is the root, "L" its left child, "LR" that child's right
+child, and so on.
+
+    python AVLGrader.py submissions.json --output grades.csv --processes 8
+
+The input is a JSON list (or JSON lines) of objects with "id",
+"sequence" and either "placement" or "coordinates".
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from AVLTree import AVLTree
+from SpatialGrid import SpatialGrid
+from TidyLayout import TidyLayout
+
+# Canvas geometry of AVLQuizApp, in world pixels at zoom 1
+ROOT_X, ROOT_Y = 500, 50
+NODE_SPACING = 60
+LEVEL_SPACING = 100
+SNAP_DISTANCE = 30
+GROUP_SIZE = 500  # Most submissions handed to a worker at once
+
+
+def slot_label(slot):
+    return slot or "root"
+
+
+def slot_nodes(root):
+    """Yield (slot, node) for every node under root, parents first"""
+    stack = [("", root)] if root is not None else []
+    while stack:
+        slot, node = stack.pop()
+        yield slot, node
+        if node.right is not None:
+            stack.append((slot + "R", node.right))
+        if node.left is not None:
+            stack.append((slot + "L", node.left))
+
+
+def slot_positions(root, layout=None):
+    """World position of every slot of the tree, as drawn by AVLQuizApp"""
+    placed = (layout or TidyLayout()).positions(root)
+    positions = {}
+    for slot, node in slot_nodes(root):
+        x, depth = placed[node]
+        positions[slot] = (ROOT_X + x * NODE_SPACING, ROOT_Y + depth * LEVEL_SPACING)
+    return positions
+
+
+class Reference:
+    """The expected answer for one insertion sequence"""
+
+    def __init__(self, sequence):
+        tree = AVLTree()
+        for key in sequence:
+            tree.insert(key)
+        self.slots = {slot: node.key for slot, node in slot_nodes(tree.root)}
+        self.tree = tree
+        self._index = None
+
+    def snap(self, coordinates, snap_distance=SNAP_DISTANCE):
+        """Turn (key, x, y) drops into a slot -> key placement"""
+        if self._index is None or self._index.radius != snap_distance:
+            self._index = SpatialGrid(snap_distance)
+            for slot, (x, y) in slot_positions(self.tree.root).items():
+                self._index.insert(slot, x, y)
+        placement = {}
+        for key, x, y in coordinates:
+            slot = self._index.nearest(x, y)
+            if slot is not None:
+                placement[slot] = key
+        return placement
+
+
+@lru_cache(maxsize=1024)
+def reference(sequence):
+    """Reference answer for a sequence (a tuple), built once and cached"""
+    return Reference(sequence)
+
+
+def check_placement(ref, placement):
+    """Error messages for a slot -> key placement, in slot order"""
+    errors = []
+    for slot, expected_key in ref.slots.items():
+        user_key = placement.get(slot)
+        if user_key is None:
+            errors.append(f"Missing node for value {expected_key}")
+        elif user_key != expected_key:
+            errors.append(f"Position {slot_label(slot)} should be {expected_key}, not {user_key}")
+    for slot in placement:
+        if slot not in ref.slots:
+            errors.append(f"Extra node placed at invalid position {slot_label(slot)}")
+    return errors
+
+
+def grade(sequence, placement=None, coordinates=None, snap_distance=SNAP_DISTANCE):
+    """Grade one submission; returns {"correct", "score", "errors"}"""
+    ref = reference(tuple(sequence))
+    if placement is None:
+        placement = ref.snap(coordinates or (), snap_distance)
+    errors = check_placement(ref, placement)
+    right = sum(placement.get(slot) == key for slot, key in ref.slots.items())
+    return {
+        "correct": not errors,
+        "score": right / len(ref.slots) if ref.slots else 1.0,
+        "errors": errors,
+    }
+
+
+def grade_submission(submission, snap_distance=SNAP_DISTANCE):
+    result = grade(submission["sequence"], submission.get("placement"),
+                   submission.get("coordinates"), snap_distance)
+    result["id"] = submission.get("id")
+    return result
+
+
+def _grade_group(args):
+    group, snap_distance = args
+    return [grade_submission(submission, snap_distance) for submission in group]
+
+
+def grade_batch(submissions, processes=None, snap_distance=SNAP_DISTANCE):
+    """Grade many submissions, in input order.
+
+    Submissions are grouped by sequence so each worker builds a reference
+    tree once per group; with processes=1 everything runs in this process.
+    """
+    groups = {}
+    for i, submission in enumerate(submissions):
+        groups.setdefault(tuple(submission["sequence"]), []).append(i)
+    # Big groups are split so one popular question still spreads over the pool
+    order = [indices[start:start + GROUP_SIZE] for indices in groups.values()
+             for start in range(0, len(indices), GROUP_SIZE)]
+    jobs = [([submissions[i] for i in indices], snap_distance) for indices in order]
+
+    if processes == 1 or len(jobs) < 2:
+        graded = list(map(_grade_group, jobs))
+    else:
+        workers = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as executor:
+            graded = list(executor.map(_grade_group, jobs,
+                                       chunksize=max(1, len(jobs) // (4 * workers))))
+    results = [None] * len(submissions)
+    for indices, group_results in zip(order, graded):
+        for i, result in zip(indices, group_results):
+            results[i] = result
+    return results
+
+
+def read_submissions(file):
+    text = file.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def write_results(results, file, fmt):
+    if fmt == "json":
+        json.dump(results, file, indent=1)
+        file.write("\n")
+        return
+    writer = csv.writer(file)
+    writer.writerow(["id", "correct", "score", "errors"])
+    for row in results:
+        writer.writerow([row["id"], row["correct"], f"{row['score']:.3f}", "; ".join(row["errors"])])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("submissions", help="JSON or JSON lines file, - for stdin")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--format", choices=("json", "csv"),
+                        help="output format, by default taken from the --output suffix")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--snap-distance", type=float, default=SNAP_DISTANCE,
+                        help="pixels within which a dropped node counts as placed")
+    args = parser.parse_args(argv)
+
+    if args.submissions == "-":
+        submissions = read_submissions(sys.stdin)
+    else:
+        with open(args.submissions) as f:
+            submissions = read_submissions(f)
+    results = grade_batch(submissions, args.processes, args.snap_distance)
+
+    fmt = args.format or ("csv" if args.output and args.output.endswith(".csv") else "json")
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_results(results, f, fmt)
+    else:
+        write_results(results, sys.stdout, fmt)
+    correct = sum(result["correct"] for result in results)
+    print(f"{correct}/{len(results)} correct", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
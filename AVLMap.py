@@ -0,0 +1,240 @@
+"""Ordered dictionary on top of AVLTree."""
+from AVLTree import AVLTree
+
+
+class AVLMap(AVLTree):
+    """Mapping from ordered keys to values, kept in an AVL tree.
+
+    Besides the dict interface it offers the ordered queries of AVLTree
+    (rank/select/irange/floor/ceiling...), bisect_left/bisect_right and
+    pop_min/pop_max.
+
+    Lookups use a finger: the root-to-node path of the last lookup, kept
+    with the key interval each node on it covers. The next lookup climbs
+    to the deepest node on it whose interval holds the new key, one
+    comparison per probe: it tries the last node, then the root's child,
+    then gallops up from the bottom (1, 2, 4, ... levels), and descends
+    from there. Two keys that share a subtree of s keys cost O(log s)
+    comparisons, which is O(log d) on average for keys d apart; adjacent
+    keys on either side of the root still share only the whole tree, and
+    then a lookup costs a root search plus about three comparisons.
+    Inserts and deletes keep the part of the finger above the nodes they
+    relinked, so nearby updates benefit as well, though every update still
+    adjusts the subtree sizes up to the root. The finger saves
+    comparisons, not interpreter steps: with int keys a plain search is
+    faster, with keys that compare in Python code it is the other way.
+    """
+
+    class Node:
+        __slots__ = ("key", "value", "left", "right", "height", "size")
+
+        def __init__(self, key, value=None):
+            self.key = key
+            self.value = value
+            self.left = None
+            self.right = None
+            self.height = 1
+            self.size = 1
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._finger = None  # [(node, lo, hi)] from the root, bounds exclusive
+        for key, value in items.items() if hasattr(items, "items") else items:
+            self[key] = value
+
+    def _locate(self, key):
+        """Return the finger ending at key's node, or at its would-be parent,
+        and whether key was found"""
+        finger = self._finger
+        if not finger or finger[0][0] is not self.root:
+            if self.root is None:
+                return [], False
+            finger = [(self.root, None, None)]
+        elif len(finger) > 1:
+            # Climb to the deepest node whose interval holds key. Every
+            # interval on the finger holds the last node's key, so only the
+            # bound on key's side (lo below it, hi above) can fail
+            side = 1 if key < finger[-1][0].key else 2
+            bound = finger[-1][side]
+            if bound is not None and not (bound < key if side == 1 else key < bound):
+                top = finger[1][side]
+                if len(finger) == 2 or not (top is None or (top < key if side == 1 else key < top)):
+                    del finger[1:]  # Not even under the root's child: start at the root
+                else:
+                    # Gallop up from just above the last node, then bisect the gap
+                    good, bad, step = len(finger) - 2, len(finger) - 1, 2
+                    while good > 1:
+                        bound = finger[good][side]
+                        if bound is None or (bound < key if side == 1 else key < bound):
+                            break
+                        bad = good
+                        good = good - step if good - step > 1 else 1
+                        step *= 2
+                    while bad - good > 1:
+                        mid = (good + bad) // 2
+                        bound = finger[mid][side]
+                        if bound is None or (bound < key if side == 1 else key < bound):
+                            good = mid
+                        else:
+                            bad = mid
+                    del finger[good + 1:]
+
+        self._finger = finger
+        node, lo, hi = finger[-1]
+        while True:
+            if key < node.key:
+                child, hi = node.left, node.key
+            elif node.key < key:
+                child, lo = node.right, node.key
+            else:
+                return finger, True
+            if child is None:
+                return finger, False
+            node = child
+            finger.append((node, lo, hi))
+
+    def search(self, key):
+        finger, found = self._locate(key)
+        return finger[-1][0] if found else None
+
+    def insert(self, key, value=None):
+        """Set key to value, adding the key if it is new"""
+        finger, found = self._locate(key)
+        if found:
+            finger[-1][0].value = value
+        elif finger:
+            self._attach([node for node, _, _ in finger], self.Node(key, value))
+        else:
+            self.root = self.Node(key, value)
+
+    def delete(self, key):
+        """Remove key, raising KeyError if it is not present"""
+        finger, found = self._locate(key)
+        if not found:
+            raise KeyError(key)
+        self._remove([node for node, _, _ in finger])
+
+    def _attach(self, path, leaf):
+        super()._attach(path, leaf)
+        self._keep_finger(None)
+
+    def _remove(self, path):
+        # The removed node's key is overwritten if it had two children, so
+        # the intervals below it no longer hold
+        node = path[-1]
+        super()._remove(path)
+        self._keep_finger(node)
+
+    def _keep_finger(self, changed):
+        """Cut the finger back to its part that is still a path from the root.
+
+        Rotations relink nodes but keep their keys, so an entry whose node
+        is still a child of the entry above it keeps its interval.
+        """
+        finger = self._finger
+        if not finger:
+            return
+        parent = None
+        for i, (node, _, _) in enumerate(finger):
+            if node is changed or (node is not self.root if parent is None
+                                   else parent.left is not node and parent.right is not node):
+                del finger[i:]
+                break
+            parent = node
+        if not finger:
+            self._finger = None
+
+    def _copy_entry(self, dst, src):
+        dst.key = src.key
+        dst.value = src.value
+
+    def _clear(self):
+        super()._clear()
+        self._finger = None
+
+    def __getitem__(self, key):
+        node = self.search(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def get(self, key, default=None):
+        node = self.search(key)
+        return default if node is None else node.value
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        return ((node.key, node.value) for node in self._nodes())
+
+    def _nodes(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def bisect_left(self, key):
+        """Index at which key would be inserted before any equal key"""
+        return self.rank(key)
+
+    def bisect_right(self, key):
+        """Index at which key would be inserted after any equal key"""
+        return self._rank_right(key)
+
+    def pop_min(self):
+        """Remove and return the (key, value) pair with the smallest key"""
+        return self._pop_end("left")
+
+    def pop_max(self):
+        """Remove and return the (key, value) pair with the largest key"""
+        return self._pop_end("right")
+
+    def _pop_end(self, side):
+        node = self.root
+        if node is None:
+            raise KeyError(f"pop_{'min' if side == 'left' else 'max'}(): map is empty")
+        path = [node]
+        while getattr(node, side) is not None:
+            node = getattr(node, side)
+            path.append(node)
+        item = node.key, node.value
+        self._remove(path)
+        return item
+
+    @classmethod
+    def from_sorted(cls, items):
+        """Build a map from (key, value) pairs in ascending key order in O(n).
+
+        For repeated keys the last value wins.
+        """
+        pairs = []
+        for key, value in items:
+            if pairs and not pairs[-1][0] < key:
+                if key < pairs[-1][0]:
+                    raise ValueError("from_sorted() needs keys in ascending order")
+                pairs[-1] = (key, value)
+                continue
+            pairs.append((key, value))
+
+        tree = super().from_sorted(key for key, _ in pairs)
+        for node, (_, value) in zip(tree._nodes(), pairs):
+            node.value = value
+        return tree
+
+    def __repr__(self):
+        return f"{type(self).__name__}({{{', '.join(f'{k!r}: {v!r}' for k, v in self.items())}}})"
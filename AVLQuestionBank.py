@@ -0,0 +1,194 @@
+"""Offline bank of AVL insertion questions, grouped by rotation profile.
+
+A question's profile is how many LL, RR, LR and RL rebalances its
+insertion sequence triggers plus the height of the final tree. The
+builder searches random sequences in worker processes and keeps up to
+--per-profile questions for every profile it finds, so rare profiles
+are not crowded out by common ones.
+
+    python AVLQuestionBank.py build avl_questions.bank --attempts 2000000
+    python AVLQuestionBank.py stats avl_questions.bank
+
+On disk the records are sorted by profile and every record has the same
+size, so loading reads a small profile table and sampling a question
+decodes one record.
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from AVLTree import AVLStats, AVLTree
+
+MAGIC = b"AVLQBNK1"
+HEADER = struct.Struct("<8sHI")  # magic, keys per record, number of profiles
+PROFILE = struct.Struct("<5BII")  # LL, RR, LR, RL, height, first record, record count
+FIELDS = AVLStats.CASES + ("height",)
+
+
+def profile_of(sequence):
+    """(LL, RR, LR, RL, height) for inserting sequence into an empty tree"""
+    tree = AVLTree()
+    stats = tree.instrument()
+    for key in sequence:
+        tree.insert(key)
+    rotations = stats.rotations
+    return tuple(rotations[case] for case in AVLStats.CASES) + (tree.root.height if tree.root else 0,)
+
+
+def search(seed, attempts, min_len, max_len, lo, hi, per_profile):
+    """Worker: classify random sequences, keeping up to per_profile of each profile"""
+    rng = random.Random(seed)
+    found = {}
+    for _ in range(attempts):
+        sequence = tuple(rng.sample(range(lo, hi + 1), rng.randint(min_len, max_len)))
+        bucket = found.setdefault(profile_of(sequence), set())
+        if len(bucket) < per_profile:
+            bucket.add(sequence)
+    return found
+
+
+def build(attempts, min_len=5, max_len=8, lo=1, hi=199, per_profile=200, processes=None, seed=0):
+    """Return {profile: [sequence, ...]} gathered by parallel workers"""
+    # Records store keys as 16-bit and lengths as 8-bit unsigned integers
+    if not 0 <= lo <= hi <= 65535:
+        raise ValueError(f"keys must satisfy 0 <= smallest <= largest <= 65535, not {lo},{hi}")
+    if not 1 <= min_len <= max_len <= 255:
+        raise ValueError(f"lengths must satisfy 1 <= min <= max <= 255, not {min_len},{max_len}")
+    if max_len > hi - lo + 1:
+        raise ValueError(f"cannot draw {max_len} distinct keys from {lo}..{hi}")
+    workers = processes or os.cpu_count() or 1
+    jobs = max(workers * 4, 1)
+    share = -(-attempts // jobs)
+    args = [(seed * 1000003 + i, share, min_len, max_len, lo, hi, per_profile) for i in range(jobs)]
+    bank = {}
+    with ProcessPoolExecutor(workers) as executor:
+        for found in executor.map(search, *zip(*args)):
+            for profile, sequences in found.items():
+                bucket = bank.setdefault(profile, set())
+                for sequence in sequences:
+                    if len(bucket) >= per_profile:
+                        break
+                    bucket.add(sequence)
+    return {profile: sorted(sequences) for profile, sequences in sorted(bank.items())}
+
+
+def write_bank(path, bank):
+    """Write {profile: [sequence, ...]} as fixed-size records sorted by profile"""
+    width = max((len(s) for sequences in bank.values() for s in sequences), default=0)
+    record = struct.Struct(f"<B{width}H")
+    table = []
+    records = []
+    for profile in sorted(bank):
+        table.append(PROFILE.pack(*profile, len(records), len(bank[profile])))
+        for sequence in bank[profile]:
+            records.append(record.pack(len(sequence), *sequence, *[0] * (width - len(sequence))))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, len(table)))
+        f.write(b"".join(table))
+        f.write(b"".join(records))
+
+
+class QuestionBank:
+    """Read-only view of a bank file; sampling decodes only the chosen record"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        magic, width, profiles = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an AVL question bank")
+        self.record = struct.Struct(f"<B{width}H")
+        self.profiles = {}  # profile -> (first record, record count)
+        offset = HEADER.size
+        for _ in range(profiles):
+            *profile, first, count = PROFILE.unpack_from(self.data, offset)
+            self.profiles[tuple(profile)] = (first, count)
+            offset += PROFILE.size
+        self.records_offset = offset
+
+    def __len__(self):
+        return sum(count for _, count in self.profiles.values())
+
+    def __getitem__(self, i):
+        length, *keys = self.record.unpack_from(self.data, self.records_offset + i * self.record.size)
+        return keys[:length]
+
+    def matching(self, **wanted):
+        """Profiles whose fields equal the given ones, e.g. matching(LR=1, height=4)"""
+        for name in wanted:
+            if name not in FIELDS:
+                raise ValueError(f"unknown profile field {name!r}, expected one of {', '.join(FIELDS)}")
+        return [profile for profile in self.profiles
+                if all(profile[FIELDS.index(name)] == value for name, value in wanted.items())]
+
+    def count(self, **wanted):
+        """Number of questions whose profile matches wanted"""
+        return sum(self.profiles[profile][1] for profile in self.matching(**wanted))
+
+    def sample(self, rng=random, **wanted):
+        """A random sequence whose profile matches wanted; ValueError if there is none"""
+        profiles = self.matching(**wanted)
+        total = sum(self.profiles[profile][1] for profile in profiles)
+        if not total:
+            raise ValueError(f"no question in the bank matches {wanted}")
+        pick = rng.randrange(total)
+        for profile in profiles:
+            first, count = self.profiles[profile]
+            if pick < count:
+                return self[first + pick]
+            pick -= count
+
+
+def parse_profile(text):
+    """'LR=1,height=4' -> {'LR': 1, 'height': 4}; ValueError for anything else"""
+    wanted = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in FIELDS:
+            raise ValueError(f"unknown profile field {name!r}, expected one of {', '.join(FIELDS)}")
+        try:
+            wanted[name] = int(value)
+        except ValueError:
+            raise ValueError(f"profile field {name} needs a whole number, as in {name}=1") from None
+    return wanted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="search sequences and write a bank")
+    build_parser.add_argument("output")
+    build_parser.add_argument("--attempts", type=int, default=10**6)
+    build_parser.add_argument("--min-len", type=int, default=5)
+    build_parser.add_argument("--max-len", type=int, default=8)
+    build_parser.add_argument("--keys", default="1,199", help="smallest,largest key")
+    build_parser.add_argument("--per-profile", type=int, default=200)
+    build_parser.add_argument("--processes", type=int)
+    build_parser.add_argument("--seed", type=int, default=0)
+    stats_parser = commands.add_parser("stats", help="list the profiles in a bank")
+    stats_parser.add_argument("bank")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        lo, hi = map(int, args.keys.split(","))
+        try:
+            bank = build(args.attempts, args.min_len, args.max_len, lo, hi, args.per_profile,
+                         args.processes, args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+        write_bank(args.output, bank)
+        print(f"{sum(map(len, bank.values()))} questions in {len(bank)} profiles", file=sys.stderr)
+    else:
+        bank = QuestionBank(args.bank)
+        print(" ".join(f"{field:>6}" for field in FIELDS) + "  questions")
+        for profile, (_, count) in sorted(bank.profiles.items()):
+            print(" ".join(f"{value:>6}" for value in profile) + f"  {count:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
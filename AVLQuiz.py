@@ -1,32 +1,73 @@
 import tkinter as tk
 from tkinter import messagebox
 import random
-from math import sqrt
+import sys
+import time
+import AVLGrader
+from AVLQuestionBank import QuestionBank, parse_profile
+from AVLReplay import ReplayWindow
 from AVLTree import AVLTree
+from SpatialGrid import SpatialGrid
+from TidyLayout import TidyLayout
 
 class AVLQuizApp:
-    def __init__(self, root):
+    SNAP_DISTANCE = AVLGrader.SNAP_DISTANCE  # Pixels from a slot's centre at which a dropped node counts as placed
+    FRAME_MS = 16  # Motion events are applied at most once per frame (~60 Hz)
+    CANVAS_WIDTH, CANVAS_HEIGHT = 1000, 600
+    # World geometry is shared with AVLGrader so exported drops grade the same
+    NODE_SPACING = AVLGrader.NODE_SPACING  # World pixels between neighbouring slots on a level
+    LEVEL_SPACING = AVLGrader.LEVEL_SPACING  # World pixels between levels
+    ROOT_X, ROOT_Y = AVLGrader.ROOT_X, AVLGrader.ROOT_Y  # World position of the root slot
+    ZOOM_STEP = 1.2
+
+    def __init__(self, root, snap_distance=None, bank=None, profile=None):
         self.root = root
+        self.snap_distance = snap_distance or self.SNAP_DISTANCE
+        # Questions come from a pre-built QuestionBank when one is given,
+        # restricted to the profile fields in profile (e.g. {"LR": 1})
+        self.bank = QuestionBank(bank) if isinstance(bank, str) else bank
+        self.profile = profile or {}
+        # Checked once here, so New Question can always draw from the bank
+        if self.bank is not None and not self.bank.count(**self.profile):
+            raise ValueError(f"no question in the bank matches the profile {self.profile}")
         self.root.title("AVL Tree Quiz")
         self.root.geometry("1200x800")
         
         self.avl = AVLTree()
         self.operations = []
+        self.slot_index = SpatialGrid(self.snap_distance)
+        self.slot_items = {}
+        self.hover_slot = None
+        self._drag_data = None
+        self._item_pool = {}  # Canvas item type -> hidden items ready for reuse
+        self._item_kind = {}  # Canvas item -> its type, so releasing asks Tk nothing
+        self.question_seconds = []  # Time taken to show each new question
+        self.layout = TidyLayout()
+        # Canvas position = world position * zoom + pan
+        self.zoom = 1.0
+        self.pan_x = self.pan_y = 0.0
+        self._view_pending = None  # after() id of the scheduled view redraw
+        self._pan_from = None
         self.generate_question()
         self.setup_ui()
         
     def generate_question(self):
         """Generate a random sequence of insertions and build the AVL tree"""
         self.avl = AVLTree()
+        self.layout.clear()
         self.operations = []
-        num_operations = random.randint(5, 8)
-        values = random.sample(range(1, 200), num_operations)
+        if self.bank is not None:
+            values = self.bank.sample(**self.profile)
+        else:
+            num_operations = random.randint(5, 8)
+            values = random.sample(range(1, 200), num_operations)
         
         for val in values:
             self.operations.append(f"Insert {val}")
             self.avl.insert(val)
         
     def setup_ui(self):
+        """Build the widgets once; later questions only redraw the canvas items"""
         self.clear_screen()
         
         # Title and instructions
@@ -39,195 +80,358 @@ class AVLQuizApp:
                 font=("Arial", 12)).pack()
         
         # Display operations
-        ops_frame = tk.Frame(self.root)
-        ops_frame.pack(pady=10)
-        
-        for op in self.operations:
-            tk.Label(ops_frame, text=op, font=("Arial", 12)).pack(side=tk.LEFT, padx=5)
+        self.ops_frame = tk.Frame(self.root)
+        self.ops_frame.pack(pady=10)
+        self.op_labels = []
+        self.labels_shown = 0  # Leading op_labels currently packed
         
         # Canvas for tree visualization
-        self.canvas = tk.Canvas(self.root, width=1000, height=600, bg="white")
+        self.canvas = tk.Canvas(self.root, width=self.CANVAS_WIDTH, height=self.CANVAS_HEIGHT,
+                                bg="white")
         self.canvas.pack(pady=20)
+        self._item_pool = {}
+        self._item_kind = {}
         
-        # Draggable nodes
-        self.draggable_nodes = []
-        self.node_values = [op.split()[1] for op in self.operations if op.startswith("Insert")]
-        self.create_draggable_nodes()
+        # Zoom with the wheel around the pointer, pan by dragging with the right button
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_at(e.x, e.y, e.delta > 0))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_at(e.x, e.y, True))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_at(e.x, e.y, False))
+        self.canvas.bind("<ButtonPress-3>", self.on_pan_start)
+        self.canvas.bind("<B3-Motion>", self.on_pan_motion)
         
-        # Draw tree template based on actual AVL structure
-        self.draw_tree_template()
+        # One binding on the shared tag; the handlers look the node up by item id
+        self.canvas.tag_bind("draggable", "<ButtonPress-1>", self.on_drag_start)
+        self.canvas.tag_bind("draggable", "<B1-Motion>", self.on_drag_motion)
+        self.canvas.tag_bind("draggable", "<ButtonRelease-1>", self.on_drag_end)
         
         # Buttons
         tk.Button(self.root, text="Check Answer", command=self.check_answer, 
                  font=("Arial", 14), bg="#4CAF50", fg="white").pack(pady=10)
         tk.Button(self.root, text="New Question", command=self.new_question,
                  font=("Arial", 12)).pack()
+        tk.Button(self.root, text="Replay Steps", command=self.replay_steps,
+                 font=("Arial", 12)).pack(pady=5)
+        
+        self.show_question()
+    
+    def show_question(self):
+        """Show the current operations and redraw the draggable and template items"""
+        if self._drag_data is not None and self._drag_data["pending"] is not None:
+            self.root.after_cancel(self._drag_data["pending"])
+        self._drag_data = None
+        
+        # Reuse the operation labels, packing or hiding only those whose turn changed
+        shown = len(self.operations)
+        while len(self.op_labels) < shown:
+            self.op_labels.append(tk.Label(self.ops_frame, font=("Arial", 12)))
+        for label, operation in zip(self.op_labels, self.operations):
+            label.configure(text=operation)
+        for label in self.op_labels[self.labels_shown:shown]:
+            label.pack(side=tk.LEFT, padx=5)
+        for label in self.op_labels[shown:self.labels_shown]:
+            label.pack_forget()
+        self.labels_shown = shown
+        
+        # Draggable nodes, indexed by canvas item id for the click lookup
+        self.release_items("draggable")
+        self.draggable_nodes = []
+        self.nodes_by_item = {}
+        self.node_values = [op.split()[1] for op in self.operations if op.startswith("Insert")]
+        self.create_draggable_nodes()
+        
+        # Draw tree template based on actual AVL structure
+        self.draw_tree_template()
+    
+    def to_canvas(self, x, y):
+        return x * self.zoom + self.pan_x, y * self.zoom + self.pan_y
+    
+    def fit_view(self):
+        """Zoom out until the whole tree fits the canvas width, root centred"""
+        lo, hi, height = self.layout.extent(self.avl.root) if self.avl.root else (0, 0, 1)
+        width = (hi - lo + 1) * self.NODE_SPACING
+        depth = height * self.LEVEL_SPACING
+        self.zoom = min(1.0, self.CANVAS_WIDTH / width, self.CANVAS_HEIGHT / depth)
+        centre = self.ROOT_X + (lo + hi) / 2 * self.NODE_SPACING
+        self.pan_x = self.CANVAS_WIDTH / 2 - centre * self.zoom
+        self.pan_y = 0.0
+    
+    def pooled_item(self, kind, coords, **options):
+        """Return a canvas item of the given kind, reusing a released one if possible.
+
+        coords None leaves a reused item where it is, for callers that place it next.
+        """
+        pool = self._item_pool.get(kind)
+        if pool:
+            item = pool.pop()
+            if coords is not None:
+                self.canvas.coords(item, *coords)
+            self.canvas.itemconfigure(item, state="normal", **options)
+            return item
+        coords = coords or (0,) * (2 if kind == "text" else 4)
+        item = getattr(self.canvas, f"create_{kind}")(*coords, **options)
+        self._item_kind[item] = kind
+        return item
+    
+    def release_items(self, tag):
+        """Hide the items carrying tag and keep them for pooled_item()"""
+        items = self.canvas.find_withtag(tag)
+        if not items:
+            return
+        # Two commands for all of them; pooled_item() replaces the other tags
+        self.canvas.itemconfigure(tag, state="hidden")
+        self.canvas.dtag(tag, tag)
+        for item in items:
+            self._item_pool.setdefault(self._item_kind[item], []).append(item)
     
     def create_draggable_nodes(self):
         """Create draggable nodes with text that move together"""
+        # Items are placed by draw_view(); positions here are in world pixels
         start_x, start_y = 50, 50
         for i, val in enumerate(self.node_values):
-            node_id = self.canvas.create_oval(
-                start_x + i*70, start_y, 
-                start_x + i*70 + 50, start_y + 50,
-                fill="#2196F3", outline="black", tags=("draggable", f"node_{val}")
+            # Oval and text share a group tag so one move() shifts both
+            group = f"group_{val}"
+            node_id = self.pooled_item(
+                "oval", None,
+                fill="#2196F3", outline="black", width=1, dash=(),
+                tags=("draggable", f"node_{val}", group)
             )
-            text_id = self.canvas.create_text(
-                start_x + i*70 + 25, start_y + 25,
-                text=val, font=("Arial", 12), tags=("draggable", f"text_{val}")
+            text_id = self.pooled_item(
+                "text", None,
+                text=val, font=("Arial", 12), tags=("draggable", f"text_{val}", group)
             )
             
-            self.draggable_nodes.append({
+            node_data = {
                 "val": val,
                 "node": node_id,
                 "text": text_id,
+                "group": group,
+                "shown": True,
                 "x": start_x + i*70 + 25,
                 "y": start_y + 25
-            })
-            
-            for item in [node_id, text_id]:
-                self.canvas.tag_bind(item, "<ButtonPress-1>", lambda e, val=val: self.on_drag_start(e, val))
-                self.canvas.tag_bind(item, "<B1-Motion>", lambda e, val=val: self.on_drag_motion(e, val))
+            }
+            self.draggable_nodes.append(node_data)
+            self.nodes_by_item[node_id] = node_data
+            self.nodes_by_item[text_id] = node_data
     
     def draw_tree_template(self):
-        """Dynamically draw tree structure based on actual AVL tree"""
-        # Clear any existing template
-        self.canvas.delete("template")
-        
-        # Calculate positions based on tree depth
+        """Lay out the AVL tree, index its slots for snapping and draw the view"""
+        # Calculate positions based on the tidy layout of the tree
         self.tree_positions = {}
+        self.slot_of = {}
+        self.slot_index = SpatialGrid(self.snap_distance)
+        self.hover_slot = None
         if self.avl.root:
-            self.calculate_positions(self.avl.root, 500, 50, 150, 1)
-            
-            # Draw connecting lines
-            self.draw_connecting_lines(self.avl.root)
-            
-            # Draw empty node positions
+            self.calculate_positions()
             for pos_name, (x, y) in self.tree_positions.items():
-                self.canvas.create_oval(x-25, y-25, x+25, y+25, 
-                                       outline="gray", dash=(2, 2), tags="template")
+                self.slot_index.insert(pos_name, x, y)
+        self.fit_view()
+        self.draw_view()
     
-    def calculate_positions(self, node, x, y, x_offset, level):
-        """Recursively calculate node positions based on AVL structure"""
-        if not node:
-            return
+    def calculate_positions(self):
+        """World position of every slot, keyed by its path from the root ("", "L", "LR"...)"""
+        self.tree_positions = AVLGrader.slot_positions(self.avl.root, self.layout)
+        self.slot_of = {node: slot for slot, node in AVLGrader.slot_nodes(self.avl.root)}
+    
+    def draw_view(self):
+        """Redraw the template for the visible part of the world only"""
+        self._view_pending = None
+        self.release_items("template")
+        self.slot_items = {}
+        zoom = self.zoom
+        r = 25 * zoom
         
-        # Store position with unique identifier
-        pos_id = f"node_{node.key}"
-        self.tree_positions[pos_id] = (x, y)
+        if self.avl.root:
+            # Visible area in layout units, one slot wider so edges into it are drawn
+            left = (-self.pan_x / zoom - self.ROOT_X) / self.NODE_SPACING - 1
+            right = ((self.CANVAS_WIDTH - self.pan_x) / zoom - self.ROOT_X) / self.NODE_SPACING + 1
+            top = (-self.pan_y / zoom - self.ROOT_Y) / self.LEVEL_SPACING - 1
+            bottom = ((self.CANVAS_HEIGHT - self.pan_y) / zoom - self.ROOT_Y) / self.LEVEL_SPACING + 1
+            visible = self.layout.positions(self.avl.root, (left, top, right, bottom))
+            
+            for node in visible:
+                pos_name = self.slot_of[node]
+                x, y = self.to_canvas(*self.tree_positions[pos_name])
+                for child in (node.left, node.right):
+                    if child is not None:
+                        cx, cy = self.to_canvas(*self.tree_positions[self.slot_of[child]])
+                        self.pooled_item("line", (x, y, cx, cy), dash=(2, 2), tags="template")
+                self.slot_items[pos_name] = self.pooled_item(
+                    "oval", (x-r, y-r, x+r, y+r), fill="", outline="gray", width=1,
+                    dash=(2, 2), tags="template")
         
-        # Calculate child positions
-        y_offset = 100
-        if node.left:
-            self.calculate_positions(node.left, x - x_offset, y + y_offset, x_offset/2, level+1)
-        if node.right:
-            self.calculate_positions(node.right, x + x_offset, y + y_offset, x_offset/2, level+1)
+        # Draggable nodes outside the canvas are hidden rather than drawn
+        for node_data in self.draggable_nodes:
+            x, y = self.to_canvas(node_data["x"], node_data["y"])
+            shown = -r <= x <= self.CANVAS_WIDTH + r and -r <= y <= self.CANVAS_HEIGHT + r
+            self.canvas.coords(node_data["node"], x-r, y-r, x+r, y+r)
+            self.canvas.coords(node_data["text"], x, y)
+            if shown != node_data["shown"]:
+                # By item, since released items may still carry the group tag
+                state = "normal" if shown else "hidden"
+                self.canvas.itemconfigure(node_data["node"], state=state)
+                self.canvas.itemconfigure(node_data["text"], state=state)
+                node_data["shown"] = shown
+        self.canvas.tag_raise("draggable")
+        
+        hover, self.hover_slot = self.hover_slot, None
+        self.show_snap_preview(hover)
+    
+    def schedule_view(self):
+        if self._view_pending is None:
+            self._view_pending = self.root.after(self.FRAME_MS, self.draw_view)
     
-    def draw_connecting_lines(self, node):
-        """Draw lines between nodes based on actual tree structure"""
-        if not node:
+    def zoom_at(self, x, y, zoom_in):
+        """Zoom by one step keeping the world point under (x, y) in place"""
+        factor = self.ZOOM_STEP if zoom_in else 1 / self.ZOOM_STEP
+        self.pan_x = x - (x - self.pan_x) * factor
+        self.pan_y = y - (y - self.pan_y) * factor
+        self.zoom *= factor
+        self.schedule_view()
+    
+    def on_pan_start(self, event):
+        self._pan_from = (event.x, event.y)
+    
+    def on_pan_motion(self, event):
+        if self._pan_from is None:
+            return
+        dx = event.x - self._pan_from[0]
+        dy = event.y - self._pan_from[1]
+        self._pan_from = (event.x, event.y)
+        self.pan_x += dx
+        self.pan_y += dy
+        # Shift what is drawn now; culling catches up on the next frame
+        self.canvas.move("template", dx, dy)
+        self.canvas.move("draggable", dx, dy)
+        self.schedule_view()
+    
+    def on_drag_start(self, event):
+        item = self.canvas.find_withtag("current")
+        node_data = self.nodes_by_item.get(item[0]) if item else None
+        if node_data is None:
             return
-        
-        parent_pos = self.tree_positions.get(f"node_{node.key}")
-        if parent_pos:
-            if node.left:
-                child_pos = self.tree_positions.get(f"node_{node.left.key}")
-                if child_pos:
-                    self.canvas.create_line(parent_pos, child_pos, dash=(2, 2), tags="template")
-                    self.draw_connecting_lines(node.left)
-            
-            if node.right:
-                child_pos = self.tree_positions.get(f"node_{node.right.key}")
-                if child_pos:
-                    self.canvas.create_line(parent_pos, child_pos, dash=(2, 2), tags="template")
-                    self.draw_connecting_lines(node.right)
-    
-    def on_drag_start(self, event, val):
-        node_data = next(n for n in self.draggable_nodes if n["val"] == val)
         self._drag_data = {
-            "val": val,
-            "start_x": event.x,
-            "start_y": event.y,
-            "initial_x": node_data["x"],
-            "initial_y": node_data["y"]
+            "node": node_data,
+            "last_x": event.x,  # Pointer position already applied to the canvas
+            "last_y": event.y,
+            "x": event.x,  # Latest pointer position seen
+            "y": event.y,
+            "pending": None  # after() id of the scheduled frame update
         }
     
-    def on_drag_motion(self, event, val):
-        if not hasattr(self, '_drag_data') or self._drag_data["val"] != val:
+    def on_drag_motion(self, event):
+        if self._drag_data is None:
+            return
+        # Only remember the pointer; the canvas catches up once per frame
+        self._drag_data["x"] = event.x
+        self._drag_data["y"] = event.y
+        if self._drag_data["pending"] is None:
+            self._drag_data["pending"] = self.root.after(self.FRAME_MS, self.apply_drag)
+    
+    def apply_drag(self):
+        """Move the dragged node to the latest pointer position"""
+        drag = self._drag_data
+        if drag is None:
+            return
+        drag["pending"] = None
+        dx = drag["x"] - drag["last_x"]
+        dy = drag["y"] - drag["last_y"]
+        if not dx and not dy:
             return
-            
-        dx = event.x - self._drag_data["start_x"]
-        dy = event.y - self._drag_data["start_y"]
-        
-        node_data = next(n for n in self.draggable_nodes if n["val"] == val)
-        self.canvas.move(node_data["node"], dx, dy)
-        self.canvas.move(node_data["text"], dx, dy)
         
-        node_data["x"] = self._drag_data["initial_x"] + dx
-        node_data["y"] = self._drag_data["initial_y"] + dy
+        node_data = drag["node"]
+        self.canvas.move(node_data["group"], dx, dy)
+        node_data["x"] += dx / self.zoom
+        node_data["y"] += dy / self.zoom
+        drag["last_x"] = drag["x"]
+        drag["last_y"] = drag["y"]
         
-        self._drag_data["start_x"] = event.x
-        self._drag_data["start_y"] = event.y
+        self.show_snap_preview(self.slot_index.nearest(node_data["x"], node_data["y"]))
+    
+    def on_drag_end(self, event):
+        if self._drag_data is None:
+            return
+        if self._drag_data["pending"] is not None:
+            self.root.after_cancel(self._drag_data["pending"])
+        self._drag_data["x"] = event.x
+        self._drag_data["y"] = event.y
+        self.apply_drag()
+        self._drag_data = None
+        self.show_snap_preview(None)
+
+    def show_snap_preview(self, pos_id):
+        """Highlight the slot a dragged node would snap to, or none"""
+        if pos_id == self.hover_slot:
+            return
+        # Slots outside the view have no canvas item
+        if self.hover_slot in self.slot_items:
+            self.canvas.itemconfigure(self.slot_items[self.hover_slot],
+                                      outline="gray", width=1, dash=(2, 2))
+        if pos_id in self.slot_items:
+            self.canvas.itemconfigure(self.slot_items[pos_id],
+                                      outline="#4CAF50", width=3, dash=())
+        self.hover_slot = pos_id
     
     def check_answer(self):
         """Validate the tree structure against user's placement"""
         # Map user's placements to tree positions
         user_placements = {}
         for node in self.draggable_nodes:
-            closest_pos = None
-            min_dist = float('inf')
-            
-            for pos_id, (pos_x, pos_y) in self.tree_positions.items():
-                dist = sqrt((node["x"] - pos_x)**2 + (node["y"] - pos_y)**2)
-                if dist < min_dist and dist < 30:  # 30 pixel threshold
-                    min_dist = dist
-                    closest_pos = pos_id
-            
-            if closest_pos:
+            closest_pos = self.slot_index.nearest(node["x"], node["y"])
+            if closest_pos is not None:
                 user_placements[closest_pos] = int(node["val"])
         
-        # Validate each node in the AVL tree
-        errors = []
-        self.validate_node(self.avl.root, None, "root", user_placements, errors)
-        
-        # Check for extra nodes placed where they shouldn't be
-        for pos_id in user_placements:
-            if not pos_id.startswith("node_"):
-                errors.append(f"Extra node placed at invalid position")
+        sequence = tuple(int(val) for val in self.node_values)
+        errors = AVLGrader.check_placement(AVLGrader.reference(sequence), user_placements)
         
         if not errors:
             messagebox.showinfo("Correct!", "Perfect! Your AVL tree is correctly constructed.")
         else:
             messagebox.showerror("Incorrect", "\n".join(errors))
     
-    def validate_node(self, node, parent, pos_id, user_placements, errors):
-        """Recursively validate each node in the tree"""
-        if not node:
-            return
-        
-        expected_key = node.key
-        user_key = user_placements.get(pos_id)
-        
-        if user_key is None:
-            errors.append(f"Missing node for value {expected_key}")
-        elif user_key != expected_key:
-            errors.append(f"Position {pos_id.replace('node_', '')} should be {expected_key}, not {user_key}")
-        
-        # Validate children
-        if node.left:
-            self.validate_node(node.left, node, f"node_{node.left.key}", user_placements, errors)
-        if node.right:
-            self.validate_node(node.right, node, f"node_{node.right.key}", user_placements, errors)
+    def replay_steps(self):
+        """Open a window that animates the insertions one by one"""
+        ReplayWindow(self.root, [int(val) for val in self.node_values])
     
     def new_question(self):
+        start = time.perf_counter()
         self.generate_question()
-        self.setup_ui()
+        self.show_question()
+        self.root.update_idletasks()  # Include the redraw in the measurement
+        self.question_seconds.append(time.perf_counter() - start)
+    
+    def timing_summary(self):
+        """One line on how long New Question took, to compare layouts or builds by"""
+        times = sorted(self.question_seconds)
+        if not times:
+            return "no new questions shown"
+        return (f"{len(times)} new questions: median {times[len(times) // 2] * 1000:.1f} ms, "
+                f"mean {sum(times) / len(times) * 1000:.1f} ms, max {times[-1] * 1000:.1f} ms")
     
     def clear_screen(self):
         for widget in self.root.winfo_children():
             widget.destroy()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="AVL Tree Quiz")
+    parser.add_argument("--bank", help="question bank written by AVLQuestionBank.py build")
+    parser.add_argument("--profile", default="", help="wanted profile, e.g. LR=1,height=4")
+    parser.add_argument("--timing", action="store_true",
+                        help="print how long each New Question took when the quiz closes")
+    args = parser.parse_args()
+    
+    try:
+        profile = parse_profile(args.profile)
+        bank = QuestionBank(args.bank) if args.bank else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    
     root = tk.Tk()
-    app = AVLQuizApp(root)
-    root.mainloop()
\ No newline at end of file
+    try:
+        app = AVLQuizApp(root, bank=bank, profile=profile)
+    except ValueError as error:
+        root.destroy()
+        parser.error(str(error))
+    root.mainloop()
+    if args.timing:
+        print(app.timing_summary(), file=sys.stderr)
\ No newline at end of file
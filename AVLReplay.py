@@ -0,0 +1,335 @@
+"""Step-by-step replay of a sequence of AVL insertions."""
+import tkinter as tk
+from collections import namedtuple
+
+from AVLTree import PersistentAVLTree
+from TidyLayout import TidyLayout
+
+# What one insert changed, positions being (x, depth) in TidyLayout units:
+# moved maps key -> (old position, new position) for the nodes the insert
+# copied, and shifted holds (node, old position, new position) for each
+# unchanged subtree that moved whole, its root standing for all its nodes
+ReplayStep = namedtuple("ReplayStep", "key path rotations added moved shifted edges_added edges_removed")
+
+
+class InsertionReplay:
+    """Records each insert of a sequence once, as the difference it made.
+
+    Every insert runs on a PersistentAVLTree, so each step's tree is a
+    snapshot sharing its unchanged subtrees with the one before, and the
+    TidyLayout cache keyed by node carries over between snapshots. A step
+    keeps the search path, the rotations (from AVLTree.instrument) and
+    only the nodes and edges that changed. Recording walks just the nodes
+    the insert copied in both snapshots, O(log n) of them, and notes a
+    shared subtree that moved by its root alone; moves(i) lists its nodes
+    when the step is shown.
+    """
+
+    def __init__(self, keys):
+        self.steps = []
+        self.snapshots = [PersistentAVLTree()]
+        self.min_x = self.max_x = 0
+        self.max_depth = 0
+        self.layout = layout = TidyLayout()
+        events = []
+        tree = self.snapshots[0]
+        tree.instrument(callback=events.append)
+        known = set()  # Every node of the snapshots so far
+
+        for key in keys:
+            path = []
+            node = tree.root
+            while node is not None and node.key != key:
+                path.append(node.key)
+                node = node.left if key < node.key else node.right
+
+            del events[:]
+            before = tree
+            tree = tree.insert(key)
+            self.snapshots.append(tree)
+
+            # The insert's new nodes, down to the shared subtrees below them
+            placed, shared = self._walk(tree.root, known.__contains__)
+            # The nodes they replaced, down to the same shared subtrees
+            replaced, old_shared = self._walk(before.root, shared.__contains__)
+            known.update(placed)
+
+            old_positions = {node.key: pos for node, pos in replaced.items()}
+            added = None
+            moved = {}
+            for node, pos in placed.items():
+                old = old_positions.get(node.key)
+                if old is None:
+                    added = pos
+                elif old != pos:
+                    moved[node.key] = (old, pos)
+            shifted = tuple((node, old_shared[node], pos) for node, pos in shared.items()
+                            if old_shared[node] != pos)
+            new_edges, old_edges = _edges(placed), _edges(replaced)
+            edges_added, edges_removed = new_edges - old_edges, old_edges - new_edges
+
+            if tree.root is not None:
+                lo, hi, height = layout.extent(tree.root)
+                self.min_x = min(self.min_x, lo)
+                self.max_x = max(self.max_x, hi)
+                self.max_depth = max(self.max_depth, height - 1)
+            self.steps.append(ReplayStep(key, tuple(path), tuple(events), added, moved,
+                                         shifted, edges_added, edges_removed))
+        tree.uninstrument()
+
+    def _walk(self, root, stop):
+        """Place root's tree from the top down to the nodes where stop(node) holds.
+
+        Returns {node: position} of the nodes passed and of the nodes stopped at.
+        """
+        passed, stopped = {}, {}
+        if root is None:
+            return passed, stopped
+        self.layout.measure(root)
+        cache = self.layout.cache
+        stack = [(root, 0, 0)]
+        while stack:
+            node, x, depth = stack.pop()
+            if stop(node):
+                stopped[node] = (x, depth)
+                continue
+            passed[node] = (x, depth)
+            offset = cache[node][0]
+            if node.left is not None:
+                stack.append((node.left, x - offset, depth + 1))
+            if node.right is not None:
+                stack.append((node.right, x + offset, depth + 1))
+        return passed, stopped
+
+    def moves(self, i):
+        """{key: (old position, new position)} of every node step i moved"""
+        step = self.steps[i - 1]
+        result = dict(step.moved)
+        for node, (ox, od), (nx, nd) in step.shifted:
+            for below, (x, depth) in self.layout.positions(node).items():
+                result[below.key] = ((ox + x, od + depth), (nx + x, nd + depth))
+        return result
+
+    def __len__(self):
+        return len(self.steps)
+
+    def describe(self, i):
+        """One line telling what step i (counting from 1) did"""
+        step = self.steps[i - 1]
+        text = f"Insert {step.key}"
+        if step.path:
+            text += ": path " + " → ".join(map(str, step.path))
+        if step.added is None:
+            text += " (already present)"
+        for event in step.rotations:
+            text += f"; {event.case} rotation at {event.pivot}, {event.new_root} moves up"
+        return text
+
+
+def _edges(nodes):
+    """(parent key, child key) of every edge leaving nodes"""
+    return {(node.key, child.key) for node in nodes
+            for child in (node.left, node.right) if child is not None}
+
+
+class ReplayWindow:
+    """Window that animates an InsertionReplay one insert at a time.
+
+    Canvas items are kept per key and per edge. Stepping forward or back
+    moves only the items of the nodes the step moved, plus their edges,
+    so a frame costs O(changed nodes). Dragging the scale applies the
+    steps in between without animation.
+    """
+    WIDTH, HEIGHT = 900, 500
+    MARGIN = 40
+    RADIUS = 18
+    FRAME_MS = 16
+    ANIMATION_FRAMES = 15
+
+    def __init__(self, master, keys, title="AVL Insertion Replay"):
+        self.replay = InsertionReplay(keys)
+        self.window = tk.Toplevel(master)
+        self.window.title(title)
+
+        self.canvas = tk.Canvas(self.window, width=self.WIDTH, height=self.HEIGHT, bg="white")
+        self.canvas.pack(padx=10, pady=10)
+        self.caption = tk.Label(self.window, font=("Arial", 12), wraplength=self.WIDTH)
+        self.caption.pack()
+
+        controls = tk.Frame(self.window)
+        controls.pack(pady=10)
+        tk.Button(controls, text="◀ Back", command=lambda: self.step_by(-1)).pack(side=tk.LEFT, padx=5)
+        self.scale = tk.Scale(controls, from_=0, to=len(self.replay), orient=tk.HORIZONTAL,
+                              length=400, showvalue=True, command=self.on_scrub)
+        self.scale.pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Next ▶", command=lambda: self.step_by(1)).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Play", command=self.play).pack(side=tk.LEFT, padx=5)
+
+        # Fixed scale for the whole sequence so nodes that do not move stay put
+        span = max(self.replay.max_x - self.replay.min_x, 1)
+        self.unit = min(60, (self.WIDTH - 2 * self.MARGIN) / span)
+        self.level = min(80, (self.HEIGHT - 2 * self.MARGIN) / max(self.replay.max_depth, 1))
+
+        self.current = 0  # Number of inserts shown
+        self.positions = {}  # key -> (x, depth) as currently drawn
+        self.node_items = {}  # key -> (oval, text)
+        self.edge_items = {}  # (parent, child) -> line
+        self.edges_of = {}  # key -> set of edges touching it
+        self.highlight = None
+        self._animation = None  # (after id, moves) while a step is animating
+        self._playing = False
+        self._next_play = None  # after id of the next step while playing
+        self.show_caption()
+
+    def to_canvas(self, pos):
+        x, depth = pos
+        return (self.MARGIN + (x - self.replay.min_x) * self.unit,
+                self.MARGIN + depth * self.level)
+
+    def place_node(self, key, pos):
+        x, y = self.to_canvas(pos)
+        r = self.RADIUS
+        oval, text = self.node_items[key]
+        self.canvas.coords(oval, x - r, y - r, x + r, y + r)
+        self.canvas.coords(text, x, y)
+
+    def place_edge(self, edge):
+        parent, child = edge
+        self.canvas.coords(self.edge_items[edge],
+                           *self.to_canvas(self.positions[parent]),
+                           *self.to_canvas(self.positions[child]))
+
+    def add_edge(self, edge):
+        self.edge_items[edge] = self.canvas.create_line(0, 0, 0, 0, fill="gray")
+        self.canvas.tag_lower(self.edge_items[edge])
+        for key in edge:
+            self.edges_of.setdefault(key, set()).add(edge)
+        self.place_edge(edge)
+
+    def remove_edge(self, edge):
+        self.canvas.delete(self.edge_items.pop(edge))
+        for key in edge:
+            self.edges_of[key].discard(edge)
+
+    def move_to(self, moves):
+        """Put each key of moves at its position and redraw the edges touching it"""
+        touched = set()
+        for key, pos in moves.items():
+            self.positions[key] = pos
+            self.place_node(key, pos)
+            touched |= self.edges_of.get(key, set())
+        for edge in touched:
+            self.place_edge(edge)
+
+    def apply(self, i, forward, animate=False):
+        """Show step i (counting from 1) done or undone"""
+        step = self.replay.steps[i - 1]
+        moved = self.replay.moves(i)
+        if forward:
+            if step.added is not None:
+                self.positions[step.key] = step.added
+                x, y = self.to_canvas(step.added)
+                r = self.RADIUS
+                self.node_items[step.key] = (
+                    self.canvas.create_oval(x - r, y - r, x + r, y + r, fill="#2196F3", outline="black"),
+                    self.canvas.create_text(x, y, text=str(step.key), font=("Arial", 11), fill="white"))
+            for edge in step.edges_removed:
+                self.remove_edge(edge)
+            if animate and moved:
+                self.animate(moved, 1)
+            else:
+                self.move_to({key: new for key, (old, new) in moved.items()})
+            for edge in step.edges_added:
+                self.add_edge(edge)
+        else:
+            for edge in step.edges_added:
+                self.remove_edge(edge)
+            self.move_to({key: old for key, (old, new) in moved.items()})
+            for edge in step.edges_removed:
+                self.add_edge(edge)
+            if step.added is not None:
+                del self.positions[step.key]
+                for item in self.node_items.pop(step.key):
+                    self.canvas.delete(item)
+        self.set_highlight(step.key if forward else None)
+
+    def animate(self, moved, frame):
+        """Move the nodes of moved one frame closer to their new positions"""
+        t = frame / self.ANIMATION_FRAMES
+        self.move_to({key: (ox + (nx - ox) * t, od + (nd - od) * t)
+                      for key, ((ox, od), (nx, nd)) in moved.items()})
+        if frame < self.ANIMATION_FRAMES:
+            after = self.window.after(self.FRAME_MS, self.animate, moved, frame + 1)
+            self._animation = (after, moved)
+        else:
+            self._animation = None
+            if self._playing:
+                self._next_play = self.window.after(400, self.play_next)
+
+    def finish_animation(self):
+        if self._animation is not None:
+            after, moved = self._animation
+            self.window.after_cancel(after)
+            self._animation = None
+            self.move_to({key: new for key, (old, new) in moved.items()})
+
+    def set_highlight(self, key):
+        if self.highlight in self.node_items:
+            self.canvas.itemconfigure(self.node_items[self.highlight][0], fill="#2196F3")
+        if key in self.node_items:
+            self.canvas.itemconfigure(self.node_items[key][0], fill="#FF9800")
+        self.highlight = key
+
+    def go_to(self, target, animate=False):
+        """Show the tree after target inserts, applying the steps in between"""
+        self.finish_animation()
+        target = max(0, min(target, len(self.replay)))
+        while self.current < target:
+            self.current += 1
+            self.apply(self.current, True, animate and self.current == target)
+        while self.current > target:
+            self.apply(self.current, False)
+            self.current -= 1
+        if self.current and self.highlight is None:
+            self.set_highlight(self.replay.steps[self.current - 1].key)
+        if int(self.scale.get()) != self.current:
+            self.scale.set(self.current)
+        self.show_caption()
+
+    def step_by(self, delta):
+        self.stop()
+        self.go_to(self.current + delta, animate=delta > 0)
+
+    def on_scrub(self, value):
+        if int(float(value)) != self.current:
+            self.stop()
+            self.go_to(int(float(value)))
+
+    def play(self):
+        """Animate the remaining inserts one after another"""
+        if not self._playing:
+            self._playing = True
+            self.play_next()
+
+    def play_next(self):
+        self._next_play = None
+        if self.current >= len(self.replay):
+            self._playing = False
+            return
+        self.go_to(self.current + 1, animate=True)
+        if self._animation is None and self._playing:
+            self._next_play = self.window.after(400, self.play_next)
+
+    def stop(self):
+        """End playback, dropping the step it has scheduled"""
+        self._playing = False
+        if self._next_play is not None:
+            self.window.after_cancel(self._next_play)
+            self._next_play = None
+
+    def show_caption(self):
+        if self.current == 0:
+            self.caption.configure(text="Empty tree")
+        else:
+            self.caption.configure(text=f"Step {self.current}/{len(self.replay)}: "
+                                        + self.replay.describe(self.current))
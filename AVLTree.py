@@ -1,3 +1,45 @@
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque, namedtuple
+
+from TreeRenderer import TreeRenderer
+
+RotationEvent = namedtuple("RotationEvent", "case pivot new_root")
+
+
+class AVLStats:
+    """Counters collected while an AVLTree is instrumented"""
+    CASES = ("LL", "RR", "LR", "RL")
+    OPERATIONS = ("insert", "delete", "search")
+
+    def __init__(self, callback=None):
+        self.callback = callback  # Called with a RotationEvent per rebalance
+        self.rotations = dict.fromkeys(self.CASES, 0)
+        self.path_lengths = {op: Counter() for op in self.OPERATIONS}
+        self.rebalance_seconds = 0.0
+        # A single rotation is only known not to be the first half of a
+        # double rotation once the next rotation (or the rebalance) is over
+        self._pending = None
+
+    def rotation(self, case, pivot, new_root):
+        self.rotations[case] += 1
+        if self.callback is not None:
+            self.callback(RotationEvent(case, pivot.key, new_root.key))
+
+    def flush(self):
+        if self._pending is not None:
+            direction, pivot, new_root = self._pending
+            self._pending = None
+            self.rotation("LL" if direction == "right" else "RR", pivot, new_root)
+
+    def as_dict(self):
+        return {
+            "rotations": dict(self.rotations),
+            "path_lengths": {op: dict(sorted(h.items())) for op, h in self.path_lengths.items()},
+            "rebalance_seconds": self.rebalance_seconds,
+        }
+
+
 class AVLTree:
     class Node:
         def __init__(self, key):
@@ -5,9 +47,13 @@ class AVLTree:
             self.left = None
             self.right = None
             self.height = 1
+            self.size = 1  # Number of keys in this subtree
 
     def __init__(self):
         self.root = None
+        self._renderer = None  # Created by the first visualize()
+        self._caches = []  # Per-node caches told about every node an update changes
+        self.stats = None  # AVLStats while instrumented
 
     def height(self, node):
         if not node:
@@ -19,6 +65,18 @@ class AVLTree:
             return 0
         return self.height(node.left) - self.height(node.right)
 
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    @classmethod
+    def _from_root(cls, root):
+        tree = cls()
+        tree.root = root
+        return tree
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
     def right_rotate(self, y):
         x = y.left
         T2 = x.right
@@ -26,10 +84,18 @@ class AVLTree:
         # Perform rotation
         x.right = y
         y.left = T2
+        if self._caches:
+            for cache in self._caches:
+                cache.invalidate((x, y))
 
-        # Update heights
-        y.height = 1 + max(self.height(y.left), self.height(y.right))
-        x.height = 1 + max(self.height(x.left), self.height(x.right))
+        # Update heights and sizes (inlined, this runs on every rebalance)
+        lh = T2.height if T2 else 0
+        rh = y.right.height if y.right else 0
+        y.height = 1 + (lh if lh > rh else rh)
+        lh = x.left.height if x.left else 0
+        x.height = 1 + (lh if lh > y.height else y.height)
+        x.size = y.size
+        y.size = 1 + (T2.size if T2 else 0) + (y.right.size if y.right else 0)
 
         # Return new root
         return x
@@ -41,115 +107,843 @@ class AVLTree:
         # Perform rotation
         y.left = x
         x.right = T2
+        if self._caches:
+            for cache in self._caches:
+                cache.invalidate((x, y))
 
-        # Update heights
-        x.height = 1 + max(self.height(x.left), self.height(x.right))
-        y.height = 1 + max(self.height(y.left), self.height(y.right))
+        # Update heights and sizes (inlined, this runs on every rebalance)
+        lh = x.left.height if x.left else 0
+        rh = T2.height if T2 else 0
+        x.height = 1 + (lh if lh > rh else rh)
+        rh = y.right.height if y.right else 0
+        y.height = 1 + (x.height if x.height > rh else rh)
+        y.size = x.size
+        x.size = 1 + (x.left.size if x.left else 0) + (T2.size if T2 else 0)
 
         # Return new root
         return y
 
     def insert(self, key):
-        self.root = self._insert(self.root, key)
+        node = self.root
+        if node is None:
+            self.root = self.Node(key)
+            return
 
-    def _insert(self, node, key):
-        # Perform normal BST insertion
-        if not node:
-            return self.Node(key)
+        # Walk down to the insertion point, remembering the path
+        path = []
+        while node is not None:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return  # Duplicate keys not allowed
+
+        self._attach(path, self.Node(key))
 
-        if key < node.key:
-            node.left = self._insert(node.left, key)
-        elif key > node.key:
-            node.right = self._insert(node.right, key)
+    def _attach(self, path, leaf):
+        """Hang a new leaf under path[-1] and rebalance; path runs down from the root"""
+        parent = path[-1]
+        if leaf.key < parent.key:
+            parent.left = leaf
         else:
-            return node  # Duplicate keys not allowed
+            parent.right = leaf
+        for node in path:
+            node.size += 1
+        if self._caches:
+            for cache in self._caches:
+                cache.invalidate(path)
+        self.root = self._rebalance(path)
+
+    def delete(self, key):
+        """Remove key from the tree, raising KeyError if it is not present"""
+        path = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                break
+        if node is None:
+            raise KeyError(key)
+        self._remove(path)
+
+    def _remove(self, path):
+        """Unlink path[-1] and rebalance; path runs down from the root"""
+        node = path.pop()
+        if node.left is not None and node.right is not None:
+            # Two children: pull up the in-order successor and unlink it instead
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            self._copy_entry(node, successor)
+            node = successor
+
+        child = node.left if node.left is not None else node.right
+        if not path:
+            self.root = child
+        elif path[-1].left is node:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        for parent in path:
+            parent.size -= 1
+        if self._caches:
+            path.append(node)
+            for cache in self._caches:
+                cache.invalidate(path)
+            path.pop()
+        if path:
+            self.root = self._rebalance(path)
+
+    def _copy_entry(self, dst, src):
+        """Copy the entry held by src (just its key here) into dst"""
+        dst.key = src.key
+
+    def discard(self, key):
+        """Remove key from the tree if it is present"""
+        if key in self:
+            self.delete(key)
+
+    def _rebalance(self, path):
+        """Fix heights and rotate on the way back up the search path.
+
+        Returns the root of the subtree that path[0] used to head.
+        """
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            left = node.left
+            right = node.right
+            lh = left.height if left else 0
+            rh = right.height if right else 0
+
+            if lh - rh > 1:
+                # Left Right Case, otherwise Left Left Case
+                if (left.right.height if left.right else 0) > (left.left.height if left.left else 0):
+                    node.left = self.left_rotate(left)
+                new_root = self.right_rotate(node)
+            elif rh - lh > 1:
+                # Right Left Case, otherwise Right Right Case
+                if (right.left.height if right.left else 0) > (right.right.height if right.right else 0):
+                    node.right = self.right_rotate(right)
+                new_root = self.left_rotate(node)
+            else:
+                node.height = 1 + (lh if lh > rh else rh)
+                if node.height == old_height:
+                    return path[0]  # Nothing above this node can change
+                continue
+
+            if i == 0:
+                return new_root
+            if path[i - 1].left is node:
+                path[i - 1].left = new_root
+            else:
+                path[i - 1].right = new_root
+            if new_root.height == old_height:
+                return path[0]
+        return path[0]
+
+    def search(self, key):
+        """Return the node holding key, or None if it is not in the tree"""
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def min(self):
+        node = self.root
+        if node is None:
+            raise ValueError("min() of empty AVLTree")
+        while node.left is not None:
+            node = node.left
+        return node.key
+
+    def max(self):
+        node = self.root
+        if node is None:
+            raise ValueError("max() of empty AVLTree")
+        while node.right is not None:
+            node = node.right
+        return node.key
+
+    def floor(self, key):
+        """Largest key <= key, or None if there is no such key"""
+        best = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                best = node.key
+                node = node.right
+            else:
+                return node.key
+        return best
 
-        # Update height
-        node.height = 1 + max(self.height(node.left), self.height(node.right))
+    def ceiling(self, key):
+        """Smallest key >= key, or None if there is no such key"""
+        best = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                best = node.key
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node.key
+        return best
 
-        # Rebalance if needed
-        balance = self.get_balance(node)
+    # Order statistics, answered from the subtree sizes in O(log n)
 
-        # Left Left Case
-        if balance > 1 and key < node.left.key:
-            return self.right_rotate(node)
+    def rank(self, key):
+        """Number of keys strictly smaller than key"""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                rank += 1 + (node.left.size if node.left else 0)
+                node = node.right
+            else:
+                node = node.left
+        return rank
 
-        # Right Right Case
-        if balance < -1 and key > node.right.key:
-            return self.left_rotate(node)
+    def _rank_right(self, key):
+        """Number of keys smaller than or equal to key"""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            else:
+                rank += 1 + (node.left.size if node.left else 0)
+                node = node.right
+        return rank
 
-        # Left Right Case
-        if balance > 1 and key > node.left.key:
-            node.left = self.left_rotate(node.left)
-            return self.right_rotate(node)
+    def select(self, k):
+        """The k-th smallest key, counting from 0; negative k counts from the end"""
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("AVLTree index out of range")
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left else 0
+            if k < left_size:
+                node = node.left
+            elif k > left_size:
+                k -= left_size + 1
+                node = node.right
+            else:
+                return node.key
 
-        # Right Left Case
-        if balance < -1 and key < node.right.key:
-            node.right = self.right_rotate(node.right)
-            return self.left_rotate(node)
+    def count_range(self, lo, hi):
+        """Number of keys in the closed range [lo, hi]"""
+        if hi < lo:
+            return 0
+        return self._rank_right(hi) - self.rank(lo)
+
+    def select_many(self, ks):
+        """select() for every k in ks, sharing the descent between nearby ranks.
+
+        Each node is visited at most once, so a batch of m ranks costs
+        O(m log(n/m + 1)) rather than m separate O(log n) walks.
+        """
+        n = len(self)
+        ks = [k + n if k < 0 else k for k in ks]
+        for k in ks:
+            if not 0 <= k < n:
+                raise IndexError("AVLTree index out of range")
+        order = sorted(range(len(ks)), key=ks.__getitem__)
+        sorted_ks = [ks[i] for i in order]
+        result = [None] * len(ks)
+
+        # Each entry is a subtree, the rank of its first key and the slice
+        # of the sorted queries that fall inside it
+        stack = [(self.root, 0, 0, len(order))] if order else []
+        while stack:
+            node, offset, lo, hi = stack.pop()
+            here = offset + (node.left.size if node.left else 0)
+            mid = bisect_left(sorted_ks, here, lo, hi)
+            end = bisect_right(sorted_ks, here, mid, hi)
+            if lo < mid:
+                stack.append((node.left, offset, lo, mid))
+            for i in range(mid, end):
+                result[order[i]] = node.key
+            if end < hi:
+                stack.append((node.right, here + 1, end, hi))
+        return result
+
+    @classmethod
+    def from_sorted(cls, iterable):
+        """Build a height-balanced tree from ascending keys in O(n)"""
+        keys = []
+        for key in iterable:
+            if keys and not keys[-1] < key:
+                if key < keys[-1]:
+                    raise ValueError("from_sorted() needs keys in ascending order")
+                continue  # Duplicate keys not allowed
+            keys.append(key)
+
+        Node = cls.Node
+
+        def build(lo, hi):
+            # Midpoint split: sibling subtrees differ in size by at most one
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = Node(keys[mid])
+            node.left = build(lo, mid)
+            node.right = build(mid + 1, hi)
+            node.height = (hi - lo).bit_length()
+            node.size = hi - lo
+            return node
+
+        return cls._from_root(build(0, len(keys)))
+
+    def copy(self):
+        """Return an independent tree with the same shape and keys"""
+        if self.root is None:
+            return type(self)()
+        Node = self.Node
+        root = Node(self.root.key)
+        stack = [(self.root, root)]
+        while stack:
+            src, dst = stack.pop()
+            self._copy_entry(dst, src)
+            dst.height = src.height
+            dst.size = src.size
+            if src.left:
+                dst.left = Node(src.left.key)
+                stack.append((src.left, dst.left))
+            if src.right:
+                dst.right = Node(src.right.key)
+                stack.append((src.right, dst.right))
+        return self._from_root(root)
+
+    # Join-based operations. These relink existing nodes instead of copying
+    # them, so every tree passed in is consumed and left empty.
+
+    @classmethod
+    def join(cls, left, key, right):
+        """Return the tree holding left's keys, key and right's keys.
+
+        Every key in left must be smaller than key and every key in right
+        larger. Runs in O(|height(left) - height(right)| + 1).
+        """
+        if (left.root is not None and not left.max() < key) or \
+                (right.root is not None and not key < right.min()):
+            raise ValueError("join() needs left < key < right")
+        tree = cls._from_root(left._join(left.root, cls.Node(key), right.root))
+        left._clear()
+        right._clear()
+        return tree
+
+    def split(self, key):
+        """Split into (keys < key, key in tree, keys > key), emptying self"""
+        left, found, right = self._split(self.root, key)
+        self._clear()
+        return self._from_root(left), found is not None, self._from_root(right)
+
+    def union(self, other):
+        """Keys in either tree, in O(m log(n/m + 1)); consumes both trees"""
+        return self._set_operation(self._union, other)
+
+    def intersection(self, other):
+        """Keys in both trees, in O(m log(n/m + 1)); consumes both trees"""
+        return self._set_operation(self._intersection, other)
 
+    def difference(self, other):
+        """Keys in self but not in other, in O(m log(n/m + 1)); consumes both trees"""
+        return self._set_operation(self._difference, other)
+
+    def _set_operation(self, operation, other):
+        root = operation(self.root, other.root)
+        self._clear()
+        other._clear()
+        return self._from_root(root)
+
+    def watch(self, cache):
+        """Keep cache.invalidate(nodes) informed of the nodes each update changes.
+
+        Layout caches keyed by node use this to redo only the nodes on an
+        update's path and those a rotation relinked.
+        """
+        if cache not in self._caches:
+            self._caches.append(cache)
+
+    def unwatch(self, cache):
+        if cache in self._caches:
+            self._caches.remove(cache)
+
+    def _clear(self):
+        self.root = None
+        # The nodes live on in another tree, which reports its own updates
+        for cache in self._caches:
+            cache.clear()
+        self._caches = []
+        self._renderer = None
+
+    def _own(self, node):
+        """Return a version of node that this operation may modify in place"""
         return node
 
+    def _join(self, left, mid, right):
+        """Link left < mid.key < right into one balanced subtree, reusing mid"""
+        hl = left.height if left else 0
+        hr = right.height if right else 0
+        mid = self._own(mid)
+
+        if hl > hr + 1:
+            # Walk down the right spine of left to a subtree as short as right
+            path = [self._own(left)]
+            node = path[0].right
+            while (node.height if node else 0) > hr + 1:
+                node = self._own(node)
+                path[-1].right = node
+                path.append(node)
+                node = node.right
+            mid.left = node
+            mid.right = right
+            hc = node.height if node else 0
+            mid.height = 1 + (hc if hc > hr else hr)
+            added = 1 + (right.size if right else 0)
+            mid.size = added + (node.size if node else 0)
+            path[-1].right = mid
+            for parent in path:
+                parent.size += added
+            return self._rebalance(path)
+
+        if hr > hl + 1:
+            # Mirror image: walk down the left spine of right
+            path = [self._own(right)]
+            node = path[0].left
+            while (node.height if node else 0) > hl + 1:
+                node = self._own(node)
+                path[-1].left = node
+                path.append(node)
+                node = node.left
+            mid.left = left
+            mid.right = node
+            hc = node.height if node else 0
+            mid.height = 1 + (hl if hl > hc else hc)
+            added = 1 + (left.size if left else 0)
+            mid.size = added + (node.size if node else 0)
+            path[-1].left = mid
+            for parent in path:
+                parent.size += added
+            return self._rebalance(path)
+
+        mid.left = left
+        mid.right = right
+        mid.height = 1 + (hl if hl > hr else hr)
+        mid.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+        return mid
+
+    def _join2(self, left, right):
+        """Join two subtrees with left < right and no middle key"""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        # Unlink the largest node of left and use it as the middle key
+        if left.right is None:
+            return self._join(left.left, left, right)
+        path = [self._own(left)]
+        node = path[0].right
+        while node.right is not None:
+            node = self._own(node)
+            path[-1].right = node
+            path.append(node)
+            node = node.right
+        path[-1].right = node.left
+        for parent in path:
+            parent.size -= 1
+        return self._join(self._rebalance(path), node, right)
+
+    def _split(self, node, key):
+        """Split a subtree into (keys < key, node holding key or None, keys > key)"""
+        lower = []  # nodes that go left, along with their left subtrees
+        upper = []  # nodes that go right, along with their right subtrees
+        found = None
+        while node is not None:
+            if key < node.key:
+                upper.append(node)
+                node = node.left
+            elif node.key < key:
+                lower.append(node)
+                node = node.right
+            else:
+                found = node
+                break
+
+        left = found.left if found else None
+        right = found.right if found else None
+        # Join the collected pieces back together from the bottom up
+        for node in reversed(lower):
+            left = self._join(node.left, node, left)
+        for node in reversed(upper):
+            right = self._join(right, node, node.right)
+        return left, found, right
+
+    def _union(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        a_left, a_right = a.left, a.right
+        b_left, _, b_right = self._split(b, a.key)
+        return self._join(self._union(a_left, b_left), a, self._union(a_right, b_right))
+
+    def _intersection(self, a, b):
+        if a is None or b is None:
+            return None
+        a_left, a_right = a.left, a.right
+        b_left, found, b_right = self._split(b, a.key)
+        left = self._intersection(a_left, b_left)
+        right = self._intersection(a_right, b_right)
+        if found is not None:
+            return self._join(left, a, right)
+        return self._join2(left, right)
+
+    def _difference(self, a, b):
+        if a is None or b is None:
+            return a
+        b_left, b_right = b.left, b.right
+        a_left, _, a_right = self._split(a, b.key)
+        return self._join2(self._difference(a_left, b_left), self._difference(a_right, b_right))
+
+    # Instrumentation. instrument() shadows a few methods on this instance
+    # only, so an uninstrumented tree runs exactly the class code.
+
+    INSTRUMENTED = ("insert", "delete", "search", "left_rotate", "right_rotate", "_rebalance")
+
+    def instrument(self, callback=None, stats=None):
+        """Start counting rotations per case, path lengths and rebalance time.
+
+        callback, if given, receives a RotationEvent for every LL/RR/LR/RL
+        rebalance. Returns the AVLStats being filled in.
+        """
+        self.uninstrument()
+        stats = stats or AVLStats(callback)
+        cls = type(self)
+
+        def path_length(key):
+            length = 0
+            node = self.root
+            while node is not None and node.key != key:
+                length += 1
+                node = node.left if key < node.key else node.right
+            return length + (node is not None)
+
+        def insert(key, *args):
+            stats.path_lengths["insert"][path_length(key)] += 1
+            result = cls.insert(self, key, *args)
+            if isinstance(result, AVLTree) and result is not self:
+                result.instrument(stats=stats)  # New persistent version
+            return result
+
+        def delete(key):
+            stats.path_lengths["delete"][path_length(key)] += 1
+            result = cls.delete(self, key)
+            if isinstance(result, AVLTree) and result is not self:
+                result.instrument(stats=stats)
+            return result
+
+        def search(key):
+            stats.path_lengths["search"][path_length(key)] += 1
+            return cls.search(self, key)
+
+        def right_rotate(y):
+            pending = stats._pending
+            if pending is not None and pending[0] == "left" and y.left is pending[2]:
+                stats._pending = None
+                new_root = cls.right_rotate(self, y)
+                stats.rotation("LR", y, new_root)
+                return new_root
+            stats.flush()
+            new_root = cls.right_rotate(self, y)
+            stats._pending = ("right", y, new_root)
+            return new_root
+
+        def left_rotate(x):
+            pending = stats._pending
+            if pending is not None and pending[0] == "right" and x.right is pending[2]:
+                stats._pending = None
+                new_root = cls.left_rotate(self, x)
+                stats.rotation("RL", x, new_root)
+                return new_root
+            stats.flush()
+            new_root = cls.left_rotate(self, x)
+            stats._pending = ("left", x, new_root)
+            return new_root
+
+        def _rebalance(path):
+            start = time.perf_counter()
+            try:
+                return cls._rebalance(self, path)
+            finally:
+                stats.rebalance_seconds += time.perf_counter() - start
+                stats.flush()
+
+        for name, method in zip(self.INSTRUMENTED, (insert, delete, search, left_rotate, right_rotate, _rebalance)):
+            setattr(self, name, method)
+        self.stats = stats
+        return stats
+
+    def uninstrument(self):
+        """Stop instrumenting and return the collected AVLStats, if any"""
+        for name in self.INSTRUMENTED:
+            self.__dict__.pop(name, None)
+        stats, self.stats = self.stats, None
+        return stats
+
+    # Lazy traversals. Each generator keeps an explicit stack of O(height)
+    # nodes and only does work for the keys that are actually consumed.
+
+    def __iter__(self):
+        return self.iter_inorder()
+
+    def __reversed__(self):
+        return self.irange(reverse=True)
+
+    def iter_inorder(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+    def iter_preorder(self):
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            yield node.key
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def iter_postorder(self):
+        stack = []
+        last = None
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+                continue
+            top = stack[-1]
+            if top.right is not None and top.right is not last:
+                node = top.right
+            else:
+                yield top.key
+                last = stack.pop()
+
+    def iter_levelorder(self):
+        """Breadth-first keys; this one holds a whole level, not just a path"""
+        queue = deque([self.root] if self.root else [])
+        while queue:
+            node = queue.popleft()
+            yield node.key
+            if node.left:
+                queue.append(node.left)
+            if node.right:
+                queue.append(node.right)
+
+    def irange(self, lo=None, hi=None, reverse=False):
+        """Keys in the closed range [lo, hi], ascending unless reverse.
+
+        Either bound may be None to leave that end open. Finding the first
+        key costs O(log n); every key after that is amortised O(1).
+        """
+        stack = []
+        node = self.root
+        if not reverse:
+            # Seed the stack with the left spine of everything >= lo
+            while node is not None:
+                if lo is not None and node.key < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            while stack:
+                node = stack.pop()
+                if hi is not None and hi < node.key:
+                    return
+                yield node.key
+                node = node.right
+                while node is not None:
+                    stack.append(node)
+                    node = node.left
+        else:
+            # Mirror image: the right spine of everything <= hi
+            while node is not None:
+                if hi is not None and hi < node.key:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            while stack:
+                node = stack.pop()
+                if lo is not None and node.key < lo:
+                    return
+                yield node.key
+                node = node.left
+                while node is not None:
+                    stack.append(node)
+                    node = node.right
+
     def pre_order(self):
-        self._pre_order(self.root)
-        print()
-
-    def _pre_order(self, node):
-        if node:
-            print(node.key, end=" ")
-            self._pre_order(node.left)
-            self._pre_order(node.right)
-
-    def visualize(self):
-        """Simple text visualization of the tree"""
-        lines, *_ = self._visualize_aux(self.root)
-        for line in lines:
-            print(line)
-
-    def _visualize_aux(self, node):
-        """Returns list of strings, width, height, and horizontal coordinate of the root"""
-        # No child
-        if node.right is None and node.left is None:
-            line = f"{node.key}({node.height})"
-            width = len(line)
-            height = 1
-            middle = width // 2
-            return [line], width, height, middle
-
-        # Only left child
-        if node.right is None:
-            lines, n, p, x = self._visualize_aux(node.left)
-            s = f"{node.key}({node.height})"
-            u = len(s)
-            first_line = (x + 1) * ' ' + (n - x - 1) * '_' + s
-            second_line = x * ' ' + '/' + (n - x - 1 + u) * ' '
-            shifted_lines = [line + u * ' ' for line in lines]
-            return [first_line, second_line] + shifted_lines, n + u, p + 2, n + u // 2
-
-        # Only right child
-        if node.left is None:
-            lines, n, p, x = self._visualize_aux(node.right)
-            s = f"{node.key}({node.height})"
-            u = len(s)
-            first_line = s + x * '_' + (n - x) * ' '
-            second_line = (u + x) * ' ' + '\\' + (n - x - 1) * ' '
-            shifted_lines = [u * ' ' + line for line in lines]
-            return [first_line, second_line] + shifted_lines, n + u, p + 2, u // 2
-
-        # Two children
-        left, n, p, x = self._visualize_aux(node.left)
-        right, m, q, y = self._visualize_aux(node.right)
-        s = f"{node.key}({node.height})"
-        u = len(s)
-        first_line = (x + 1) * ' ' + (n - x - 1) * '_' + s + y * '_' + (m - y) * ' '
-        second_line = x * ' ' + '/' + (n - x - 1 + u + y) * ' ' + '\\' + (m - y - 1) * ' '
-        if p < q:
-            left += [n * ' '] * (q - p)
-        elif q < p:
-            right += [m * ' '] * (p - q)
-        zipped_lines = zip(left, right)
-        lines = [first_line, second_line] + [a + u * ' ' + b for a, b in zipped_lines]
-        return lines, n + m + u, max(p, q) + 2, n + u // 2
+        print(*self.iter_preorder())
+
+    def visualize(self, file=None, max_depth=None, max_width=None):
+        """Text visualization of the tree, streamed to file (stdout by default)"""
+        if self._renderer is None:
+            self._renderer = TreeRenderer()
+            self.watch(self._renderer)
+        self._renderer.write(self.root, file, max_depth, max_width)
+
+
+class SlottedAVLTree(AVLTree):
+    """AVLTree whose nodes use __slots__ instead of a per-node __dict__"""
+    class Node:
+        __slots__ = ("key", "left", "right", "height", "size")
+
+        def __init__(self, key):
+            self.key = key
+            self.left = None
+            self.right = None
+            self.height = 1
+            self.size = 1
+
+
+class PersistentAVLTree(SlottedAVLTree):
+    """AVLTree whose versions are immutable and share structure.
+
+    insert() and delete() leave the tree untouched and return a new
+    version that copies only the O(log n) nodes on the search path (plus
+    the few a rotation relinks); every other subtree is shared with the
+    old version. Set operations, split and join likewise return new
+    versions without consuming their inputs.
+    """
+
+    def _own(self, node):
+        clone = self.Node(node.key)
+        clone.left = node.left
+        clone.right = node.right
+        clone.height = node.height
+        clone.size = node.size
+        return clone
+
+    def _copy_path(self, path):
+        """Copy a root-to-node path, linking each copy to the next"""
+        copies = [self._own(node) for node in path]
+        for i in range(1, len(path)):
+            if path[i - 1].left is path[i]:
+                copies[i - 1].left = copies[i]
+            else:
+                copies[i - 1].right = copies[i]
+        return copies
+
+    def _clear(self):
+        pass  # Old versions stay valid
+
+    def copy(self):
+        return self._from_root(self.root)
+
+    # Both nodes a rotation relinks may still be shared with older versions
+
+    def right_rotate(self, y):
+        y = self._own(y)
+        y.left = self._own(y.left)
+        return super().right_rotate(y)
+
+    def left_rotate(self, x):
+        x = self._own(x)
+        x.right = self._own(x.right)
+        return super().left_rotate(x)
+
+    def insert(self, key):
+        """Return a new version that also holds key"""
+        node = self.root
+        if node is None:
+            return self._from_root(self.Node(key))
+
+        path = []
+        while node is not None:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return self  # Duplicate keys not allowed
+
+        path = self._copy_path(path)
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = self.Node(key)
+        else:
+            parent.right = self.Node(key)
+        for node in path:
+            node.size += 1
+        return self._from_root(self._rebalance(path))
+
+    def delete(self, key):
+        """Return a new version without key, raising KeyError if it is not present"""
+        path = []
+        node = self.root
+        while node is not None and node.key != key:
+            path.append(node)
+            node = node.left if key < node.key else node.right
+        if node is None:
+            raise KeyError(key)
+
+        target = len(path)
+        two_children = node.left is not None and node.right is not None
+        path.append(node)
+        if two_children:
+            node = node.right
+            while node is not None:
+                path.append(node)
+                node = node.left
+
+        path = self._copy_path(path)
+        removed = path.pop()
+        if two_children:
+            self._copy_entry(path[target], removed)
+        child = removed.left if removed.left is not None else removed.right
+        if not path:
+            return self._from_root(child)
+        if path[-1].left is removed:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        for node in path:
+            node.size -= 1
+        return self._from_root(self._rebalance(path))
+
+    def discard(self, key):
+        """Return a new version without key, or self if key is not present"""
+        return self.delete(key) if key in self else self
 
 
 # Example usage
@@ -0,0 +1,651 @@
+"""AVL tree stored in parallel typed arrays instead of node objects.
+
+Node i lives at index i of five arrays (key, left child, right child,
+height and subtree size). Index 0 is a shared empty sentinel with height 0, so child
+heights can be read without a None check. Deleted slots are chained
+through the left array into a free list and reused by later inserts.
+Keys must fit in a signed 64-bit integer.
+
+Measured with `python AVLBenchmark.py --sizes 1e6 --distributions random
+--ops insert` (CPython 3.11, 64-bit):
+
+    structure   class           bytes/key   inserts/sec
+    dict-tree   AVLTree             ~112         ~70k
+    slots       SlottedAVLTree       ~72         ~80k
+    array       ArrayAVLTree         ~21         ~75k
+
+The object layouts are measured without the key objects themselves,
+which the array layout does not need at all. The subtree sizes behind
+rank() and select() account for 8 bytes/key in the object layouts and
+4 in the array (~104, ~64 and ~17 without them).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from TreeRenderer import TreeRenderer
+
+KEY_TYPE = 'q'
+INDEX_TYPE = 'i'
+HEIGHT_TYPE = 'b'
+
+
+class ArrayAVLTree:
+    class NodeView:
+        """Read-only node-like view of one slot, for code that walks node.left/node.right"""
+        __slots__ = ("tree", "index")
+
+        def __init__(self, tree, index):
+            self.tree = tree
+            self.index = index
+
+        @property
+        def key(self):
+            return self.tree._key[self.index]
+
+        @property
+        def height(self):
+            return self.tree._height[self.index]
+
+        @property
+        def left(self):
+            return self.tree._view(self.tree._left[self.index])
+
+        @property
+        def right(self):
+            return self.tree._view(self.tree._right[self.index])
+
+        def __eq__(self, other):
+            return isinstance(other, type(self)) and self.tree is other.tree and self.index == other.index
+
+        def __hash__(self):
+            return hash(self.index)
+
+    def __init__(self):
+        self._key = array(KEY_TYPE, [0])
+        self._left = array(INDEX_TYPE, [0])
+        self._right = array(INDEX_TYPE, [0])
+        self._height = array(HEIGHT_TYPE, [0])
+        self._size = array(INDEX_TYPE, [0])
+        self._root = 0
+        self._free = 0
+
+    @property
+    def root(self):
+        return self._view(self._root)
+
+    def _view(self, index):
+        return self.NodeView(self, index) if index else None
+
+    def __len__(self):
+        return self._size[self._root]
+
+    def __contains__(self, key):
+        return self._find(key) != 0
+
+    def nbytes(self):
+        """Bytes held by the node arrays, including spare capacity and free slots"""
+        return sum(a.buffer_info()[1] * a.itemsize
+                   for a in (self._key, self._left, self._right, self._height, self._size))
+
+    def height(self, node):
+        """Height of a node view from root/search, 0 for None"""
+        return self._height[node.index] if node else 0
+
+    def get_balance(self, node):
+        if not node:
+            return 0
+        return self._height[self._left[node.index]] - self._height[self._right[node.index]]
+
+    def _new(self, key):
+        node = self._free
+        if node:
+            self._free = self._left[node]
+            self._key[node] = key
+            self._left[node] = 0
+            self._right[node] = 0
+            self._height[node] = 1
+            self._size[node] = 1
+            return node
+        self._key.append(key)
+        self._left.append(0)
+        self._right.append(0)
+        self._height.append(1)
+        self._size.append(1)
+        return len(self._key) - 1
+
+    def _release(self, node):
+        self._left[node] = self._free
+        self._right[node] = 0
+        self._height[node] = 0
+        self._size[node] = 0
+        self._free = node
+
+    def right_rotate(self, y):
+        left, right, height = self._left, self._right, self._height
+        x = left[y]
+        T2 = right[x]
+
+        # Perform rotation
+        right[x] = y
+        left[y] = T2
+
+        # Update heights and sizes
+        lh = height[T2]
+        rh = height[right[y]]
+        hy = height[y] = 1 + (lh if lh > rh else rh)
+        lh = height[left[x]]
+        height[x] = 1 + (lh if lh > hy else hy)
+        size = self._size
+        size[x] = size[y]
+        size[y] = 1 + size[T2] + size[right[y]]
+
+        # Return new root
+        return x
+
+    def left_rotate(self, x):
+        left, right, height = self._left, self._right, self._height
+        y = right[x]
+        T2 = left[y]
+
+        # Perform rotation
+        left[y] = x
+        right[x] = T2
+
+        # Update heights and sizes
+        lh = height[left[x]]
+        rh = height[T2]
+        hx = height[x] = 1 + (lh if lh > rh else rh)
+        rh = height[right[y]]
+        height[y] = 1 + (hx if hx > rh else rh)
+        size = self._size
+        size[y] = size[x]
+        size[x] = 1 + size[left[x]] + size[T2]
+
+        # Return new root
+        return y
+
+    def insert(self, key):
+        keys, left, right = self._key, self._left, self._right
+        node = self._root
+        if not node:
+            self._root = self._new(key)
+            return
+
+        # Walk down to the insertion point, remembering the path
+        path = []
+        while node:
+            path.append(node)
+            k = keys[node]
+            if key < k:
+                node = left[node]
+            elif k < key:
+                node = right[node]
+            else:
+                return  # Duplicate keys not allowed
+
+        parent = path[-1]
+        if key < keys[parent]:
+            left[parent] = self._new(key)
+        else:
+            right[parent] = self._new(key)
+        size = self._size
+        for node in path:
+            size[node] += 1
+        self._root = self._rebalance(path)
+
+    def delete(self, key):
+        """Remove key from the tree, raising KeyError if it is not present"""
+        keys, left, right = self._key, self._left, self._right
+        path = []
+        node = self._root
+        while node and keys[node] != key:
+            path.append(node)
+            node = left[node] if key < keys[node] else right[node]
+        if not node:
+            raise KeyError(key)
+
+        if left[node] and right[node]:
+            # Two children: pull up the in-order successor and unlink it instead
+            path.append(node)
+            successor = right[node]
+            while left[successor]:
+                path.append(successor)
+                successor = left[successor]
+            keys[node] = keys[successor]
+            node = successor
+
+        child = left[node] or right[node]
+        if not path:
+            self._root = child
+        elif left[path[-1]] == node:
+            left[path[-1]] = child
+        else:
+            right[path[-1]] = child
+        self._release(node)
+        size = self._size
+        for node in path:
+            size[node] -= 1
+        if path:
+            self._root = self._rebalance(path)
+
+    def discard(self, key):
+        """Remove key from the tree if it is present"""
+        if key in self:
+            self.delete(key)
+
+    def _rebalance(self, path):
+        """Fix heights and rotate on the way back up the search path.
+
+        Returns the root of the subtree that path[0] used to head.
+        """
+        left, right, height = self._left, self._right, self._height
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = height[node]
+            l = left[node]
+            r = right[node]
+            lh = height[l]
+            rh = height[r]
+
+            if lh - rh > 1:
+                # Left Right Case, otherwise Left Left Case
+                if height[right[l]] > height[left[l]]:
+                    left[node] = self.left_rotate(l)
+                new_root = self.right_rotate(node)
+            elif rh - lh > 1:
+                # Right Left Case, otherwise Right Right Case
+                if height[left[r]] > height[right[r]]:
+                    right[node] = self.right_rotate(r)
+                new_root = self.left_rotate(node)
+            else:
+                h = height[node] = 1 + (lh if lh > rh else rh)
+                if h == old_height:
+                    return path[0]  # Nothing above this node can change
+                continue
+
+            if i == 0:
+                return new_root
+            if left[path[i - 1]] == node:
+                left[path[i - 1]] = new_root
+            else:
+                right[path[i - 1]] = new_root
+            if height[new_root] == old_height:
+                return path[0]
+        return path[0]
+
+    def search(self, key):
+        """Return the node holding key, or None if it is not in the tree"""
+        return self._view(self._find(key))
+
+    def _find(self, key):
+        """Slot index holding key, 0 if it is not in the tree"""
+        keys, left, right = self._key, self._left, self._right
+        node = self._root
+        while node:
+            k = keys[node]
+            if key < k:
+                node = left[node]
+            elif k < key:
+                node = right[node]
+            else:
+                return node
+        return 0
+
+    def min(self):
+        node = self._root
+        if not node:
+            raise ValueError("min() of empty ArrayAVLTree")
+        while self._left[node]:
+            node = self._left[node]
+        return self._key[node]
+
+    def max(self):
+        node = self._root
+        if not node:
+            raise ValueError("max() of empty ArrayAVLTree")
+        while self._right[node]:
+            node = self._right[node]
+        return self._key[node]
+
+    def floor(self, key):
+        """Largest key <= key, or None if there is no such key"""
+        keys, left, right = self._key, self._left, self._right
+        best = None
+        node = self._root
+        while node:
+            k = keys[node]
+            if key < k:
+                node = left[node]
+            elif k < key:
+                best = k
+                node = right[node]
+            else:
+                return k
+        return best
+
+    def ceiling(self, key):
+        """Smallest key >= key, or None if there is no such key"""
+        keys, left, right = self._key, self._left, self._right
+        best = None
+        node = self._root
+        while node:
+            k = keys[node]
+            if key < k:
+                best = k
+                node = left[node]
+            elif k < key:
+                node = right[node]
+            else:
+                return k
+        return best
+
+    # Order statistics, answered from the subtree sizes in O(log n)
+
+    def rank(self, key):
+        """Number of keys strictly smaller than key"""
+        keys, left, right, size = self._key, self._left, self._right, self._size
+        rank = 0
+        node = self._root
+        while node:
+            if keys[node] < key:
+                rank += 1 + size[left[node]]
+                node = right[node]
+            else:
+                node = left[node]
+        return rank
+
+    def _rank_right(self, key):
+        """Number of keys smaller than or equal to key"""
+        keys, left, right, size = self._key, self._left, self._right, self._size
+        rank = 0
+        node = self._root
+        while node:
+            if key < keys[node]:
+                node = left[node]
+            else:
+                rank += 1 + size[left[node]]
+                node = right[node]
+        return rank
+
+    def select(self, k):
+        """The k-th smallest key, counting from 0; negative k counts from the end"""
+        left, right, size = self._left, self._right, self._size
+        n = size[self._root]
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("ArrayAVLTree index out of range")
+        node = self._root
+        while True:
+            left_size = size[left[node]]
+            if k < left_size:
+                node = left[node]
+            elif k > left_size:
+                k -= left_size + 1
+                node = right[node]
+            else:
+                return self._key[node]
+
+    def count_range(self, lo, hi):
+        """Number of keys in the closed range [lo, hi]"""
+        if hi < lo:
+            return 0
+        return self._rank_right(hi) - self.rank(lo)
+
+    def select_many(self, ks):
+        """select() for every k in ks, visiting each node at most once"""
+        left, right, size = self._left, self._right, self._size
+        n = size[self._root]
+        ks = [k + n if k < 0 else k for k in ks]
+        for k in ks:
+            if not 0 <= k < n:
+                raise IndexError("ArrayAVLTree index out of range")
+        order = sorted(range(len(ks)), key=ks.__getitem__)
+        sorted_ks = [ks[i] for i in order]
+        result = [None] * len(ks)
+
+        stack = [(self._root, 0, 0, len(order))] if order else []
+        while stack:
+            node, offset, lo, hi = stack.pop()
+            here = offset + size[left[node]]
+            mid = bisect_left(sorted_ks, here, lo, hi)
+            end = bisect_right(sorted_ks, here, mid, hi)
+            if lo < mid:
+                stack.append((left[node], offset, lo, mid))
+            for i in range(mid, end):
+                result[order[i]] = self._key[node]
+            if end < hi:
+                stack.append((right[node], here + 1, end, hi))
+        return result
+
+    def _keys(self):
+        """All keys in ascending order"""
+        return list(self.iter_inorder())
+
+    @classmethod
+    def from_sorted(cls, iterable):
+        """Build a height-balanced tree from ascending keys in O(n)"""
+        keys = []
+        for key in iterable:
+            if keys and not keys[-1] < key:
+                if key < keys[-1]:
+                    raise ValueError("from_sorted() needs keys in ascending order")
+                continue  # Duplicate keys not allowed
+            keys.append(key)
+
+        # Slot i + 1 holds keys[i], so the arrays come out in key order
+        n = len(keys)
+        tree = cls()
+        tree._key = array(KEY_TYPE, [0])
+        tree._key.extend(keys)
+        tree._left = array(INDEX_TYPE, bytes(tree._left.itemsize * (n + 1)))
+        tree._right = array(INDEX_TYPE, bytes(tree._right.itemsize * (n + 1)))
+        tree._height = array(HEIGHT_TYPE, bytes(n + 1))
+        tree._size = array(INDEX_TYPE, bytes(tree._size.itemsize * (n + 1)))
+        left, right, height, size = tree._left, tree._right, tree._height, tree._size
+
+        def build(lo, hi):
+            if lo >= hi:
+                return 0
+            mid = (lo + hi) // 2
+            node = mid + 1
+            left[node] = build(lo, mid)
+            right[node] = build(mid + 1, hi)
+            height[node] = (hi - lo).bit_length()
+            size[node] = hi - lo
+            return node
+
+        tree._root = build(0, n)
+        return tree
+
+    def copy(self):
+        """Return an independent tree with the same shape and keys"""
+        tree = type(self)()
+        tree._key = array(KEY_TYPE, self._key)
+        tree._left = array(INDEX_TYPE, self._left)
+        tree._right = array(INDEX_TYPE, self._right)
+        tree._height = array(HEIGHT_TYPE, self._height)
+        tree._size = array(INDEX_TYPE, self._size)
+        tree._root = self._root
+        tree._free = self._free
+        return tree
+
+    def _clear(self):
+        self.__init__()
+
+    # The set operations below keep AVLTree's signatures and consume their
+    # inputs the same way, but two array trees never share storage, so they
+    # merge the sorted key runs and rebuild in O(n + m).
+
+    @classmethod
+    def join(cls, left, key, right):
+        """Return the tree holding left's keys, key and right's keys"""
+        if (left._root and not left.max() < key) or (right._root and not key < right.min()):
+            raise ValueError("join() needs left < key < right")
+        keys = left._keys()
+        keys.append(key)
+        keys.extend(right._keys())
+        left._clear()
+        right._clear()
+        return cls.from_sorted(keys)
+
+    def split(self, key):
+        """Split into (keys < key, key in tree, keys > key), emptying self"""
+        keys = self._keys()
+        found = key in self
+        self._clear()
+        return (self.from_sorted(k for k in keys if k < key), found,
+                self.from_sorted(k for k in keys if key < k))
+
+    def union(self, other):
+        """Keys in either tree; consumes both trees"""
+        return self._merge(other, True, True, True)
+
+    def intersection(self, other):
+        """Keys in both trees; consumes both trees"""
+        return self._merge(other, False, True, False)
+
+    def difference(self, other):
+        """Keys in self but not in other; consumes both trees"""
+        return self._merge(other, True, False, False)
+
+    def _merge(self, other, keep_self, keep_both, keep_other):
+        a = self._keys()
+        b = other._keys()
+        self._clear()
+        other._clear()
+        out = []
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if a[i] < b[j]:
+                if keep_self:
+                    out.append(a[i])
+                i += 1
+            elif b[j] < a[i]:
+                if keep_other:
+                    out.append(b[j])
+                j += 1
+            else:
+                if keep_both:
+                    out.append(a[i])
+                i += 1
+                j += 1
+        if keep_self:
+            out.extend(a[i:])
+        if keep_other:
+            out.extend(b[j:])
+        return self.from_sorted(out)
+
+    # Lazy traversals. Each generator keeps an explicit stack of O(height)
+    # nodes and only does work for the keys that are actually consumed.
+
+    def __iter__(self):
+        return self.iter_inorder()
+
+    def __reversed__(self):
+        return self.irange(reverse=True)
+
+    def iter_inorder(self):
+        keys, left, right = self._key, self._left, self._right
+        stack = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = left[node]
+            node = stack.pop()
+            yield keys[node]
+            node = right[node]
+
+    def iter_preorder(self):
+        keys, left, right = self._key, self._left, self._right
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            yield keys[node]
+            if right[node]:
+                stack.append(right[node])
+            if left[node]:
+                stack.append(left[node])
+
+    def iter_postorder(self):
+        keys, left, right = self._key, self._left, self._right
+        stack = []
+        last = 0
+        node = self._root
+        while stack or node:
+            if node:
+                stack.append(node)
+                node = left[node]
+                continue
+            top = stack[-1]
+            if right[top] and right[top] != last:
+                node = right[top]
+            else:
+                yield keys[top]
+                last = stack.pop()
+
+    def iter_levelorder(self):
+        """Breadth-first keys; this one holds a whole level, not just a path"""
+        keys, left, right = self._key, self._left, self._right
+        queue = deque([self._root] if self._root else [])
+        while queue:
+            node = queue.popleft()
+            yield keys[node]
+            if left[node]:
+                queue.append(left[node])
+            if right[node]:
+                queue.append(right[node])
+
+    def irange(self, lo=None, hi=None, reverse=False):
+        """Keys in the closed range [lo, hi], ascending unless reverse.
+
+        Either bound may be None to leave that end open. Finding the first
+        key costs O(log n); every key after that is amortised O(1).
+        """
+        keys, left, right = self._key, self._left, self._right
+        stack = []
+        node = self._root
+        if not reverse:
+            # Seed the stack with the left spine of everything >= lo
+            while node:
+                if lo is not None and keys[node] < lo:
+                    node = right[node]
+                else:
+                    stack.append(node)
+                    node = left[node]
+            while stack:
+                node = stack.pop()
+                if hi is not None and hi < keys[node]:
+                    return
+                yield keys[node]
+                node = right[node]
+                while node:
+                    stack.append(node)
+                    node = left[node]
+        else:
+            # Mirror image: the right spine of everything <= hi
+            while node:
+                if hi is not None and hi < keys[node]:
+                    node = left[node]
+                else:
+                    stack.append(node)
+                    node = right[node]
+            while stack:
+                node = stack.pop()
+                if lo is not None and keys[node] < lo:
+                    return
+                yield keys[node]
+                node = left[node]
+                while node:
+                    stack.append(node)
+                    node = right[node]
+
+    def pre_order(self):
+        print(*self.iter_preorder())
+
+    def visualize(self, file=None, max_depth=None, max_width=None):
+        """Text visualization of the tree, streamed to file (stdout by default)"""
+        # Slots are reused after deletes, so layouts are not cached across calls
+        TreeRenderer(cached=False).write(self.root, file, max_depth, max_width)
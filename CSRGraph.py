@@ -0,0 +1,212 @@
+"""Compact graph storage and traversals for the graph quizzes."""
+import heapq
+from array import array
+from collections import deque
+
+
+def _as_array(values, typecode):
+    """Copy a sequence or NumPy array into an array.array of typecode"""
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    result = array(typecode)
+    if hasattr(values, "astype"):  # NumPy: copy the buffer, not element by element
+        result.frombytes(values.astype(f"i{result.itemsize}").tobytes())
+    else:
+        result.extend(values)
+    return result
+
+
+class CSRGraph:
+    """Graph in compressed sparse row form.
+
+    The neighbours of node u are indices[indptr[u]:indptr[u + 1]], sorted
+    ascending, with the matching edge weights in weights. Nodes are
+    numbered 0..n-1; labels maps numbers back to names and is sorted, so
+    visiting neighbours by number is the same as visiting them by name.
+    Undirected edges are stored in both directions. Visited flags are a
+    bytearray of one byte per node, so 10^6 nodes take 1 MB.
+
+    All traversals break ties towards the smaller node, which reproduces
+    the orders the quizzes have always used.
+    """
+
+    def __init__(self, indptr, indices, weights=None, labels=None):
+        self.indptr = _as_array(indptr, "q")
+        self.indices = _as_array(indices, "i")
+        self.weights = None if weights is None else array("d", weights)
+        self.labels = labels
+        self._index = None
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges, directed=False, weights=None, labels=None):
+        """Build from (u, v) pairs of node numbers, dropping repeated edges"""
+        adjacency = [[] for _ in range(num_nodes)]
+        if weights is None:
+            for u, v in edges:
+                adjacency[u].append(v)
+                if not directed:
+                    adjacency[v].append(u)
+        else:
+            for (u, v), w in zip(edges, weights):
+                adjacency[u].append((v, w))
+                if not directed:
+                    adjacency[v].append((u, w))
+
+        indptr = array("q", [0])
+        indices = array("i")
+        weight_array = None if weights is None else array("d")
+        for neighbours in adjacency:
+            if weights is None:
+                indices.extend(sorted(set(neighbours)))
+            else:
+                last = None
+                for v, w in sorted(neighbours):
+                    if v != last:
+                        indices.append(v)
+                        weight_array.append(w)
+                        last = v
+            indptr.append(len(indices))
+        return cls(indptr, indices, weight_array, labels)
+
+    @classmethod
+    def from_networkx(cls, graph, weight=None):
+        """Build from a networkx graph, numbering nodes in sorted order"""
+        labels = sorted(graph.nodes())
+        index = {label: i for i, label in enumerate(labels)}
+        edges = [(index[u], index[v]) for u, v in graph.edges()]
+        weights = None
+        if weight is not None:
+            weights = [data.get(weight, 1) for _, _, data in graph.edges(data=True)]
+        return cls.from_edges(len(labels), edges, graph.is_directed(), weights, labels)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def neighbors(self, u):
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def index(self, label):
+        """Node number of a label"""
+        if self.labels is None:
+            return label
+        if self._index is None:
+            self._index = {label: i for i, label in enumerate(self.labels)}
+        return self._index[label]
+
+    def label_order(self, nodes):
+        """Labels of a sequence of node numbers"""
+        if self.labels is None:
+            return list(nodes)
+        labels = self.labels
+        return [labels[u] for u in nodes]
+
+    def dfs(self, start):
+        """Visit order of a stack DFS that pushes unvisited neighbours largest first"""
+        indptr, indices = self.indptr, self.indices
+        visited = bytearray(len(self))
+        order = []
+        stack = array("i", [start])
+        while stack:
+            u = stack.pop()
+            if visited[u]:
+                continue
+            visited[u] = 1
+            order.append(u)
+            neighbours = indices[indptr[u]:indptr[u + 1]]
+            neighbours.reverse()
+            stack.extend([v for v in neighbours if not visited[v]])
+        return order
+
+    def bfs(self, start):
+        """Visit order of a BFS that enqueues neighbours smallest first"""
+        indptr, indices = self.indptr, self.indices
+        visited = bytearray(len(self))
+        visited[start] = 1
+        order = [start]
+        queue = deque(order)
+        while queue:
+            u = queue.popleft()
+            for v in indices[indptr[u]:indptr[u + 1]]:
+                if not visited[v]:
+                    visited[v] = 1
+                    order.append(v)
+                    queue.append(v)
+        return order
+
+    def topological_order(self):
+        """Kahn's algorithm taking the smallest ready node first.
+
+        Raises ValueError if the graph has a cycle.
+        """
+        indptr, indices = self.indptr, self.indices
+        n = len(self)
+        indegree = array("i", bytes(4 * n))
+        for v in indices:
+            indegree[v] += 1
+        ready = [u for u in range(n) if not indegree[u]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            u = heapq.heappop(ready)
+            order.append(u)
+            for v in indices[indptr[u]:indptr[u + 1]]:
+                indegree[v] -= 1
+                if not indegree[v]:
+                    heapq.heappush(ready, v)
+        if len(order) < n:
+            raise ValueError("graph has a cycle")
+        return order
+
+    def components(self):
+        """Connected components as sorted node lists, ordered by smallest node.
+
+        Edges are followed as stored, so for a directed graph this gives
+        the components reachable in edge direction from each new root.
+        """
+        indptr, indices = self.indptr, self.indices
+        visited = bytearray(len(self))
+        result = []
+        for root in range(len(self)):
+            if visited[root]:
+                continue
+            visited[root] = 1
+            component = [root]
+            stack = [root]
+            while stack:
+                u = stack.pop()
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    if not visited[v]:
+                        visited[v] = 1
+                        component.append(v)
+                        stack.append(v)
+            component.sort()
+            result.append(component)
+        return result
+
+    def dijkstra(self, source):
+        """Shortest distances from source, inf for unreachable nodes.
+
+        Unweighted graphs count every edge as 1. Returns (dist, parent)
+        lists, parent[source] and parent of unreachable nodes being -1;
+        equal distances are settled smallest node first.
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        n = len(self)
+        dist = [float("inf")] * n
+        parent = [-1] * n
+        done = bytearray(n)
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = 1
+            for i in range(indptr[u], indptr[u + 1]):
+                v = indices[i]
+                nd = d + (weights[i] if weights is not None else 1)
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
@@ -0,0 +1,176 @@
+"""Offline bank of DFS quiz rounds: graphs with their answers and layouts.
+
+The builder generates random connected graphs in worker processes, each
+with its DFS and BFS orders from node A and the layout the quiz would
+draw, and writes them to one binary file:
+
+    python DFSQuestionBank.py build dfs_questions.bank --count 1000000
+    python DFSQuestionBank.py stats dfs_questions.bank
+
+Graph i is generated from the seed sequence (seed, i) alone, so a bank
+is the same whatever the number of processes. The file is a header, an
+index of record offsets and the records. Every record has the same
+fixed-width fields, sized by its node and edge counts, so the app maps
+the file read-only and reads round i in O(1) straight from the mapping;
+any number of processes share the one copy in the page cache.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+from GraphGenerator import node_labels, random_connected_graph, to_networkx
+from GraphLayout import quiz_layout
+
+MAGIC = b"DFSQBNK1"
+HEADER = struct.Struct("<8sQ")  # magic, number of records
+RECORD = struct.Struct("<II")  # nodes, stored edges (both directions)
+CHUNK = 1000  # graphs per worker task
+
+BankQuestion = namedtuple("BankQuestion", "graph dfs bfs positions")
+
+
+def _fields(offset, n, m):
+    """(dtype, count, offset) of positions, indptr, indices, dfs and bfs of a record"""
+    fields = []
+    offset += RECORD.size
+    for dtype, count in (("<f4", 2 * n), ("<u4", n + 1), ("<u2", m), ("<u2", n), ("<u2", n)):
+        fields.append((dtype, count, offset))
+        offset += np.dtype(dtype).itemsize * count
+    return fields
+
+
+def encode(graph, positions):
+    """One record: the graph, its DFS and BFS orders from node 0 and its positions"""
+    n, m = len(graph), len(graph.indices)
+    arrays = (np.asarray(positions, dtype="<f4"), np.asarray(graph.indptr, dtype="<u4"),
+              np.asarray(graph.indices, dtype="<u2"), np.asarray(graph.dfs(0), dtype="<u2"),
+              np.asarray(graph.bfs(0), dtype="<u2"))
+    data = RECORD.pack(n, m) + b"".join(a.tobytes() for a in arrays)
+    return data + bytes(-len(data) % 8)  # Keep the next record aligned
+
+
+def generate(seed, first, count, min_nodes, max_nodes, edges_per_node):
+    """Worker: records for graphs first .. first + count - 1"""
+    records = []
+    for i in range(first, first + count):
+        rng = np.random.default_rng([seed, i])
+        n = int(rng.integers(min_nodes, max_nodes + 1))
+        m = min(max(round(n * edges_per_node), n - 1), n * (n - 1) // 2)
+        graph = random_connected_graph(n, m, seed=rng)
+        layout = quiz_layout(to_networkx(graph))
+        records.append(encode(graph, [layout[label] for label in graph.labels]))
+    return records
+
+
+def build(path, count, min_nodes=8, max_nodes=8, edges_per_node=1.5, processes=None, seed=0):
+    """Generate count graphs in parallel and write them to path.
+
+    The bank is written to a temporary file next to path and renamed over
+    it only once complete, so a failed build never leaves a bank behind.
+    """
+    if count < 0:
+        raise ValueError(f"count must not be negative, not {count}")
+    if not 1 <= min_nodes <= max_nodes:
+        raise ValueError(f"need 1 <= smallest <= largest node count, not {min_nodes},{max_nodes}")
+    if max_nodes > 65535:
+        raise ValueError("a bank stores node numbers in 16 bits, so at most 65535 nodes")
+    partial = f"{path}.partial"
+    try:
+        _write(partial, count, min_nodes, max_nodes, edges_per_node, processes, seed)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def _write(path, count, min_nodes, max_nodes, edges_per_node, processes, seed):
+    workers = processes or os.cpu_count() or 1
+    starts = range(0, count, CHUNK)
+    offsets = array("Q")
+    with open(path, "wb") as f, ProcessPoolExecutor(workers) as executor:
+        f.write(HEADER.pack(MAGIC, count))
+        f.seek(HEADER.size + 8 * (count + 1))
+        offset = f.tell()
+        jobs = executor.map(generate, [seed] * len(starts), starts,
+                            [min(CHUNK, count - s) for s in starts], [min_nodes] * len(starts),
+                            [max_nodes] * len(starts), [edges_per_node] * len(starts))
+        # Records are written as the chunks arrive, in order; the index goes last
+        for records in jobs:
+            for record in records:
+                offsets.append(offset)
+                offset += len(record)
+            f.write(b"".join(records))
+        offsets.append(offset)
+        f.seek(HEADER.size)
+        f.write(offsets.tobytes())
+
+
+class DFSQuestionBank:
+    """Read-only memory-mapped bank; reading a round touches only its record"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a DFS question bank")
+        self.offsets = np.frombuffer(self.data, dtype="<u8", count=count + 1, offset=HEADER.size)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        offset = int(self.offsets[i])
+        n, m = RECORD.unpack_from(self.data, offset)
+        positions, indptr, indices, dfs, bfs = (np.frombuffer(self.data, dtype, count, start)
+                                                for dtype, count, start in _fields(offset, n, m))
+        graph = CSRGraph(indptr, indices, labels=node_labels(n))
+        return BankQuestion(graph, dfs.tolist(), bfs.tolist(), positions.reshape(n, 2))
+
+    def sizes(self):
+        """Node count of every record, read from the record headers"""
+        return np.array([RECORD.unpack_from(self.data, int(offset))[0] for offset in self.offsets[:-1]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="generate graphs and write a bank")
+    build_parser.add_argument("output")
+    build_parser.add_argument("--count", type=int, default=10**5)
+    build_parser.add_argument("--nodes", default="8", help="node count, or smallest,largest")
+    build_parser.add_argument("--edges-per-node", type=float, default=1.5)
+    build_parser.add_argument("--processes", type=int)
+    build_parser.add_argument("--seed", type=int, default=0)
+    stats_parser = commands.add_parser("stats", help="count the graphs in a bank by size")
+    stats_parser.add_argument("bank")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        lo, _, hi = args.nodes.partition(",")
+        try:
+            build(args.output, args.count, int(lo), int(hi or lo), args.edges_per_node,
+                  args.processes, args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"{args.count} graphs written to {args.output}", file=sys.stderr)
+    else:
+        bank = DFSQuestionBank(args.bank)
+        sizes, counts = np.unique(bank.sizes(), return_counts=True)
+        print(" nodes  questions")
+        for size, count in zip(sizes, counts):
+            print(f"{size:>6}  {count:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
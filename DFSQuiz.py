@@ -1,28 +1,59 @@
 import tkinter as tk
 from tkinter import messagebox
 import networkx as nx
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 import random
-import string
+from concurrent.futures import ThreadPoolExecutor
+from CSRGraph import CSRGraph
+from DFSQuestionBank import DFSQuestionBank
+from GraphGenerator import random_connected_graph, to_networkx
+from GraphLayout import LayoutCache, graph_key, quiz_layout
+from TraversalCheck import DFSOrderChecker
 
 NUM_NODES = 8
 NUM_EDGES = 12
+POLL_MS = 20
 
 class DFSQuizApp:
-    def __init__(self, root):
+    def __init__(self, root, strict=False, bank=None):
         self.root = root
+        # strict: only the smallest-neighbour-first order counts; otherwise
+        # any valid DFS order from the start node does
+        self.strict = strict
+        # Rounds come from a prebuilt DFSQuestionBank file if one is given
+        self.bank = DFSQuestionBank(bank) if bank else None
+        if self.bank is not None and not len(self.bank):
+            # Rounds are drawn on a worker thread, where this would only
+            # surface later from future.result() and no round would show
+            raise ValueError(f"{bank} holds no questions")
         self.root.title("Random DFS Quiz Game")
         self.score = 0
         self.round = 0
 
-        self.instruction_label = tk.Label(root, text="🧠 DFS Quiz:\nClick the nodes in the order you think a DFS traversal would visit them, starting from the alphabetically first node.", font=("Arial", 12), justify="center", wraplength=400)
+        self.instruction_label = tk.Label(root, text="🧠 DFS Quiz:\nClick the nodes in the order you think a DFS traversal would visit them, starting from the alphabetically first node." + ("" if strict else "\nAny valid DFS order counts."), font=("Arial", 12), justify="center", wraplength=400)
         self.instruction_label.pack(pady=10)
 
         self.canvas_frame = tk.Frame(root)
         self.canvas_frame.pack()
 
-        self.graph_canvas = None
+        # One figure for the life of the app; each round redraws its axes and
+        # highlighting only recolours the node collection and blits it
+        self.figure = Figure(figsize=(5, 4))
+        self.ax = self.figure.add_subplot()
+        self.graph_canvas = FigureCanvasTkAgg(self.figure, master=self.canvas_frame)
+        self.graph_canvas.get_tk_widget().pack()
+        self.graph_canvas.mpl_connect("draw_event", self.on_draw)
+        self.node_collection = None
+        self.node_labels = {}
+        self.background = None
+        self.animation_ids = []
+        # Rounds are generated and laid out on a worker thread; the next one
+        # is prepared while the current one is played
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.layout_cache = LayoutCache(64)
+        self.next_round = None
+        self.pending_round = None
         self.buttons_frame = tk.Frame(root)
         self.buttons_frame.pack()
         self.control_frame = tk.Frame(root)
@@ -33,6 +64,8 @@ class DFSQuizApp:
         self.order_label.grid(row=0, column=0, columnspan=3)
         self.score_label = tk.Label(self.control_frame, text="Score: 0", font=("Arial", 12, 'bold'))
         self.score_label.grid(row=1, column=0, columnspan=3)
+        self.feedback_label = tk.Label(self.control_frame, text="", font=("Arial", 12))
+        self.feedback_label.grid(row=3, column=0, columnspan=3)
 
         # Buttons
         self.submit_btn = tk.Button(self.control_frame, text="Submit", bg="lightgreen", font=("Arial", 12), command=self.submit)
@@ -45,17 +78,63 @@ class DFSQuizApp:
         self.solution_btn.grid(row=2, column=2, padx=10)
 
         self.selected_order = []
+        self.correct_order = []
+        self.checker = None
         self.buttons = {}
 
         self.new_round()
 
     def new_round(self):
+        self.cancel_animation()
+        if self.pending_round is not None:
+            return  # Still waiting for the last request
+        future, self.next_round = self.next_round, None
+        if future is None:
+            future = self.executor.submit(self.prepare_round)
+        self.pending_round = future
+        self.wait_for_round()
+
+    def wait_for_round(self):
+        """Poll the worker from the Tk loop so the window stays responsive"""
+        future = self.pending_round
+        if not future.done():
+            self.root.after(POLL_MS, self.wait_for_round)
+            return
+        self.pending_round = None
+        self.show_round(*future.result())
+        self.next_round = self.executor.submit(self.prepare_round)
+
+    def prepare_round(self):
+        """Worker thread: graph, start node, answer and layout; no Tk calls here"""
+        if self.bank is not None:
+            question = self.bank[random.randrange(len(self.bank))]
+            csr = question.graph
+            pos = dict(zip(csr.labels, question.positions))
+            return to_networkx(csr), csr, csr.labels[0], csr.label_order(question.dfs), pos
+        G = self.generate_random_graph()
+        csr = CSRGraph.from_networkx(G)
+        start_node = csr.labels[0]
+        correct_order = csr.label_order(csr.dfs(0))
+        return G, csr, start_node, correct_order, self.layout(G)
+
+    def layout(self, G):
+        """Node positions, from the cache if this graph has been laid out before"""
+        key = graph_key(G)
+        pos = self.layout_cache.get(key)
+        if pos is None:
+            pos = quiz_layout(G)
+            self.layout_cache.put(key, pos)
+        return pos
+
+    def show_round(self, G, csr, start_node, correct_order, pos):
         self.round += 1
         self.selected_order = []
-        self.G = self.generate_random_graph()
-        self.start_node = sorted(self.G.nodes())[0]
-        self.correct_order = self.dfs(self.G, self.start_node)
-        self.pos = nx.spring_layout(self.G, seed=42)
+        self.G = G
+        self.csr = csr
+        self.checker = DFSOrderChecker(csr, csr.index(start_node), self.strict)
+        self.start_node = start_node
+        self.correct_order = correct_order
+        self.pos = pos
         self.draw_graph()
 
         for widget in self.buttons_frame.winfo_children():
@@ -69,84 +148,131 @@ class DFSQuizApp:
             self.buttons[node] = btn
 
         self.order_label.config(text="Selected Order: []")
+        self.feedback_label.config(text="")
 
     def generate_random_graph(self):
-        nodes = list(string.ascii_uppercase[:NUM_NODES])
-        G = nx.Graph()
-        G.add_nodes_from(nodes)
-
-        # Ensure connectivity
-        connected = set()
-        available = set(nodes)
-        current = random.choice(nodes)
-        connected.add(current)
-        available.remove(current)
-
-        while available:
-            next_node = random.choice(list(available))
-            connect_to = random.choice(list(connected))
-            G.add_edge(current, next_node)
-            connected.add(next_node)
-            available.remove(next_node)
-
-        # Add extra random edges
-        while G.number_of_edges() < NUM_EDGES:
-            u, v = random.sample(nodes, 2)
-            if not G.has_edge(u, v):
-                G.add_edge(u, v)
-
-        return G
+        # Connected by a random spanning tree, extra edges sampled without
+        # replacement; seeded from random so random.seed() still applies
+        return to_networkx(random_connected_graph(NUM_NODES, NUM_EDGES, seed=random.getrandbits(64)))
 
     def draw_graph(self, highlight_nodes=None):
-        if self.graph_canvas:
-            self.graph_canvas.get_tk_widget().destroy()
-
-        fig, ax = plt.subplots(figsize=(5, 4))
-        node_colors = ['lightgreen' if highlight_nodes and node in highlight_nodes else 'skyblue' for node in self.G.nodes()]
-        nx.draw(self.G, pos=self.pos, with_labels=True, node_color=node_colors, edge_color='gray',
-                node_size=1000, font_size=12, ax=ax)
-        self.graph_canvas = FigureCanvasTkAgg(fig, master=self.canvas_frame)
+        """Draw the round's graph on the shared axes"""
+        self.ax.clear()
+        self.ax.set_axis_off()
+        self.node_list = list(self.G.nodes())
+        nx.draw_networkx_edges(self.G, pos=self.pos, edge_color='gray', node_size=1000, ax=self.ax)
+        self.node_collection = nx.draw_networkx_nodes(self.G, pos=self.pos, nodelist=self.node_list,
+                                                      node_color='skyblue', node_size=1000, ax=self.ax)
+        self.node_labels = nx.draw_networkx_labels(self.G, pos=self.pos, font_size=12, ax=self.ax)
+        # Nodes and labels are drawn over a cached background of the edges
+        self.node_collection.set_animated(True)
+        for label in self.node_labels.values():
+            label.set_animated(True)
+        self.set_node_colors(highlight_nodes)
         self.graph_canvas.draw()
-        self.graph_canvas.get_tk_widget().pack()
 
-    def dfs(self, graph, start):
-        visited = []
-        stack = [start]
-        while stack:
-            node = stack.pop()
-            if node not in visited:
-                visited.append(node)
-                neighbors = sorted([n for n in graph.neighbors(node) if n not in visited], reverse=True)
-                stack.extend(neighbors)
-        return visited
+    def on_draw(self, event):
+        """After a full redraw, cache the static background and draw the nodes over it"""
+        self.background = self.graph_canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_nodes()
+
+    def draw_nodes(self):
+        if self.node_collection is None:
+            return
+        self.figure.draw_artist(self.node_collection)
+        for label in self.node_labels.values():
+            self.figure.draw_artist(label)
+
+    def set_node_colors(self, highlight_nodes=None):
+        highlight = set(highlight_nodes or ())
+        self.node_collection.set_facecolor(['lightgreen' if node in highlight else 'skyblue'
+                                            for node in self.node_list])
+
+    def highlight(self, highlight_nodes):
+        """Recolour the nodes and blit them over the cached background"""
+        self.set_node_colors(highlight_nodes)
+        if self.background is None:
+            self.graph_canvas.draw_idle()
+            return
+        self.graph_canvas.restore_region(self.background)
+        self.draw_nodes()
+        self.graph_canvas.blit(self.figure.bbox)
 
     def select_node(self, node):
         if node in self.selected_order:
-            self.selected_order.remove(node)
+            # Undo back to the removed click and replay the ones after it
+            i = self.selected_order.index(node)
+            later = self.selected_order[i + 1:]
+            while len(self.checker) > i:
+                self.checker.pop()
+            self.selected_order[i:] = later
+            self.checker.extend(self.csr.index(n) for n in later)
             self.order_label.config(text=f"Selected Order: {self.selected_order}")
             self.buttons[node].config(state="normal")
         else:
             self.selected_order.append(node)
+            self.checker.push(self.csr.index(node))
             self.order_label.config(text=f"Selected Order: {self.selected_order}")
             #self.buttons[node].config(state="disabled")
+        self.show_feedback()
+
+    def show_feedback(self):
+        """Say after each click whether the order so far can still be a DFS"""
+        checker = self.checker
+        if not checker.valid:
+            node = self.selected_order[checker.bad]
+            self.feedback_label.config(text=f"✗ {node} can't come next", fg="red")
+        elif checker.complete():
+            self.feedback_label.config(text="✓ Complete, submit it!", fg="green")
+        elif self.selected_order:
+            self.feedback_label.config(text="✓ So far so good", fg="green")
+        else:
+            self.feedback_label.config(text="")
 
     def submit(self):
-        if self.selected_order == self.correct_order:
+        if self.checker is None:
+            return  # The first round is still being prepared
+        if self.checker.complete():
             self.score += 1
             messagebox.showinfo("Correct!", "Great job! You found the correct DFS order.")
         else:
-            messagebox.showerror("Incorrect", f"Wrong order!\nCorrect: {self.correct_order}")
+            messagebox.showerror("Incorrect", f"Wrong order!\n{'Correct' if self.strict else 'For example'}: {self.correct_order}")
         self.score_label.config(text=f"Score: {self.score}")
 
     def show_solution(self):
         self.animate_solution(self.correct_order)
 
     def animate_solution(self, order):
-        for i in range(len(order) + 1):
-            self.root.after(500 * i, lambda i=i: self.draw_graph(highlight_nodes=order[:i]))
+        self.cancel_animation()
+        self.animation_ids = [self.root.after(500 * i, lambda i=i: self.highlight(order[:i]))
+                              for i in range(len(order) + 1)]
+
+    def cancel_animation(self):
+        for after_id in self.animation_ids:
+            self.root.after_cancel(after_id)
+        self.animation_ids = []
+
+    def close(self):
+        """Release the figure and its canvas before the window goes"""
+        self.cancel_animation()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.figure.clear()
+        self.graph_canvas.get_tk_widget().destroy()
+        self.root.destroy()
 
 # Run the app
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="DFS Quiz")
+    parser.add_argument("--bank", help="question bank written by DFSQuestionBank.py build")
+    parser.add_argument("--strict", action="store_true", help="only accept the smallest-neighbour-first order")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = DFSQuizApp(root)
+    try:
+        app = DFSQuizApp(root, strict=args.strict, bank=args.bank)
+    except (OSError, ValueError) as error:
+        root.destroy()
+        parser.error(str(error))
+    root.protocol("WM_DELETE_WINDOW", app.close)
     root.mainloop()
@@ -0,0 +1,84 @@
+"""Random connected graphs for the graph quizzes, generated with NumPy."""
+import networkx as nx
+import numpy as np
+
+from CSRGraph import CSRGraph
+
+
+def node_labels(n):
+    """n labels that sort in node order: A..Z, then AA..ZZ, AAA..., all one width"""
+    width = 1
+    while 26 ** width < n:
+        width += 1
+    letters = np.arange(n)[:, None] // 26 ** np.arange(width - 1, -1, -1) % 26
+    codes = (letters + ord("A")).astype(np.uint8)
+    return [bytes(row).decode("ascii") for row in codes]
+
+
+def pair_codes(u, v):
+    """Number the unordered pair {u, v} (u != v) in 0 .. n(n-1)/2 - 1"""
+    lo = np.minimum(u, v).astype(np.int64)
+    hi = np.maximum(u, v).astype(np.int64)
+    return hi * (hi - 1) // 2 + lo
+
+
+def decode_pairs(codes):
+    """Inverse of pair_codes: (lo, hi) arrays"""
+    codes = np.asarray(codes, dtype=np.int64)
+    hi = ((1 + np.sqrt(1 + 8 * codes.astype(np.float64))) // 2).astype(np.int64)
+    # Correct the float estimate where it is off by one
+    hi -= hi * (hi - 1) // 2 > codes
+    hi += (hi + 1) * hi // 2 <= codes
+    return codes - hi * (hi - 1) // 2, hi
+
+
+def random_connected_graph(num_nodes, num_edges, seed=None, labels=True):
+    """Random connected simple graph as a CSRGraph.
+
+    A random recursive tree (node i joins a random earlier node of a
+    random permutation) makes the graph connected; the remaining edges
+    are drawn without replacement from the pairs not in the tree, so
+    there is no rejection loop however dense the graph. At least
+    num_nodes - 1 edges are always produced; more than n(n-1)/2 is a
+    ValueError.
+    """
+    n = num_nodes
+    total = n * (n - 1) // 2
+    if num_edges > total:
+        raise ValueError(f"a simple graph on {n} nodes has at most {total} edges, not {num_edges}")
+    rng = np.random.default_rng(seed)
+
+    if n > 1:
+        order = rng.permutation(n)
+        parents = order[(rng.random(n - 1) * np.arange(1, n)).astype(np.int64)]
+        tree = pair_codes(order[1:], parents)
+    else:
+        tree = np.empty(0, dtype=np.int64)
+
+    extra = max(num_edges - len(tree), 0)
+    if extra:
+        # Oversample by the tree size; after dropping tree pairs enough remain
+        candidates = rng.choice(total, size=min(extra + len(tree), total), replace=False)
+        candidates = candidates[~np.isin(candidates, tree)][:extra]
+        codes = np.concatenate([tree, candidates])
+    else:
+        codes = tree
+    lo, hi = decode_pairs(codes)
+
+    # Both directions, sorted by source then target
+    src = np.concatenate([lo, hi])
+    dst = np.concatenate([hi, lo])
+    order = np.argsort(src * n + dst, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return CSRGraph(indptr, dst[order], labels=node_labels(n) if labels else None)
+
+
+def to_networkx(csr):
+    """Undirected networkx graph of a CSRGraph, nodes named by its labels"""
+    labels = csr.labels if csr.labels is not None else range(len(csr))
+    G = nx.Graph()
+    G.add_nodes_from(labels)
+    G.add_edges_from((labels[u], labels[v]) for u in range(len(csr))
+                     for v in csr.neighbors(u) if u < v)
+    return G
@@ -0,0 +1,158 @@
+"""Graph layouts for the graph quizzes: a cache and a fast force-directed layout."""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from CSRGraph import CSRGraph
+
+SPRING_MAX_NODES = 200  # larger graphs use the Barnes-Hut force layout
+
+
+def graph_key(graph):
+    """Hash of a networkx graph's labelled structure, independent of insertion order"""
+    nodes = sorted(graph.nodes())
+    if graph.is_directed():
+        edges = sorted(graph.edges())
+    else:
+        edges = sorted(tuple(sorted(edge)) for edge in graph.edges())
+    digest = hashlib.blake2b(repr((graph.is_directed(), nodes, edges)).encode(), digest_size=16)
+    return digest.hexdigest()
+
+
+class LayoutCache:
+    """Least-recently-used map from graph_key() to node positions; thread safe"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, positions):
+        with self.lock:
+            self.entries[key] = positions
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _far_offsets():
+    """(dx, dy) of the 27 far cells for each parity of a cell's (x, y)"""
+    table = np.zeros((4, 27, 2), dtype=np.int64)
+    for px in (0, 1):
+        for py in (0, 1):
+            # The 6 x 6 children of the parent's 3 x 3 neighbourhood, minus
+            # the 3 x 3 cells next to this one
+            pairs = [(dx, dy) for dx in range(-2 - px, 4 - px) for dy in range(-2 - py, 4 - py)
+                     if abs(dx) > 1 or abs(dy) > 1]
+            table[2 * px + py] = pairs
+    return table
+
+
+FAR_OFFSETS = _far_offsets()
+NEAR_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+
+
+def _repulsion(positions, k):
+    """Approximate sum over other nodes of k^2 * (p - q) / |p - q|^2.
+
+    Barnes-Hut on a grid pyramid: at level l the unit square is cut into
+    2^l x 2^l cells and a node feels the 27 cells of its parent's 3 x 3
+    neighbourhood that are not next to its own cell, each as one mass at
+    its centroid. Across the levels every other node is counted exactly
+    once; at the finest level the 3 x 3 cells around the node's own are
+    taken as centroids too, minus the node itself. Cost is O(n log n).
+    """
+    n = len(positions)
+    force = np.zeros_like(positions)
+    depth = max(2, int(np.ceil(np.log(max(n, 2)) / np.log(4))))
+    for level in range(2, depth + 1):
+        side = 1 << level
+        cell = np.minimum((positions * side).astype(np.int64), side - 1)
+        cx, cy = cell[:, 0], cell[:, 1]
+        _pull_from_cells(force, positions, cx, cy, side, FAR_OFFSETS[2 * (cx & 1) + (cy & 1)], k)
+        if level == depth:
+            _pull_from_cells(force, positions, cx, cy, side, NEAR_OFFSETS, k, near=True)
+    return force
+
+
+def _pull_from_cells(force, positions, cx, cy, side, offsets, k, near=False):
+    """Add the repulsion of the cells at (cx, cy) + offsets, as centroids"""
+    count = side * side
+    cells = cx * side + cy
+    # One extra empty cell stands in for offsets that fall off the grid
+    mass = np.bincount(cells, minlength=count + 1).astype(np.float64)
+    sx = np.bincount(cells, weights=positions[:, 0], minlength=count + 1)
+    sy = np.bincount(cells, weights=positions[:, 1], minlength=count + 1)
+
+    tx = cx[:, None] + offsets[..., 0]
+    ty = cy[:, None] + offsets[..., 1]
+    target = np.where((tx >= 0) & (tx < side) & (ty >= 0) & (ty < side), tx * side + ty, count)
+    m, mx, my = mass[target], sx[target], sy[target]
+    if near:
+        # Leave the node itself out of its own cell
+        own = target == cells[:, None]
+        m -= own
+        mx -= own * positions[:, 0, None]
+        my -= own * positions[:, 1, None]
+    safe = np.maximum(m, 1)
+    dx = positions[:, 0, None] - mx / safe
+    dy = positions[:, 1, None] - my / safe
+    scale = k * k * m / np.maximum(dx * dx + dy * dy, 1e-9)
+    force[:, 0] += (scale * dx).sum(axis=1)
+    force[:, 1] += (scale * dy).sum(axis=1)
+
+
+def force_layout(graph, iterations=50, seed=None):
+    """Fruchterman-Reingold layout of a CSRGraph in O(n log n + m) per iteration.
+
+    Repulsion uses a grid Barnes-Hut approximation and everything is
+    vectorised, so 10^4-10^5 nodes are practical where the exact O(n^2)
+    spring layout is not. Returns an (n, 2) array scaled to [-1, 1].
+    """
+    n = len(graph)
+    rng = np.random.default_rng(seed)
+    positions = rng.random((n, 2))
+    if n < 2:
+        return positions * 0
+    indptr = np.frombuffer(graph.indptr, dtype=np.int64)
+    indices = np.frombuffer(graph.indices, dtype=np.int32).astype(np.int64)
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    k = np.sqrt(1.0 / n)
+    temperature = 0.1
+
+    for _ in range(iterations):
+        displacement = _repulsion(positions, k)
+        delta = positions[src] - positions[indices]
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        pull = delta * (dist / k)[:, None]
+        displacement[:, 0] -= np.bincount(src, weights=pull[:, 0], minlength=n)
+        displacement[:, 1] -= np.bincount(src, weights=pull[:, 1], minlength=n)
+
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+        # Keep the layout in the unit square the grid covers
+        lo = positions.min(axis=0)
+        positions = (positions - lo) / max((positions.max(axis=0) - lo).max(), 1e-9)
+        temperature *= 0.95
+    return positions * 2 - 1
+
+
+def quiz_layout(graph):
+    """{node: position} for a networkx graph, the way the quizzes draw it"""
+    if len(graph) <= SPRING_MAX_NODES:
+        return nx.spring_layout(graph, seed=42)
+    csr = CSRGraph.from_networkx(graph)
+    return dict(zip(csr.labels, force_layout(csr, seed=42)))
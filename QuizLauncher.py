@@ -0,0 +1,198 @@
+"""One entry point for all the quizzes, with the window up before the heavy imports.
+
+    python QuizLauncher.py               # pick a quiz from a menu
+    python QuizLauncher.py dfs           # open one directly (eassistant, avl, dfs)
+    python QuizLauncher.py dfs --importtime
+
+Only tkinter is imported before the first window is shown. A quiz's
+module, and with it networkx, matplotlib or NumPy, is imported on a
+worker thread once that quiz is chosen while the window shows a loading
+message, and the app is built on the Tk thread when the import is done.
+--importtime prints the same per-module table as python -X importtime
+for the quiz's import, then the time to the first window and to the
+quiz being ready, all measured from the start of this script.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import importlib
+import sys
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+# name: (module, class, button text)
+QUIZZES = {
+    "eassistant": ("QuizApp", "QuizApp", "eAssistant Quiz"),
+    "avl": ("AVLQuiz", "AVLQuizApp", "AVL Tree Quiz"),
+    "dfs": ("DFSQuiz", "DFSQuizApp", "DFS Quiz"),
+}
+POLL_MS = 20
+
+
+class ImportTimer:
+    """Meta path hook timing every module executed while it is installed.
+
+    Rows are (depth, module, self us, cumulative us) in the order the
+    imports finish, which is the order -X importtime prints them in.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.local = threading.local()
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *exc):
+        sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def timed(self, name, run):
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(0)  # time spent in nested imports
+        start = time.perf_counter()
+        try:
+            run()
+        finally:
+            total = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.rows.append((len(stack), name, int((total - nested) * 1e6), int(total * 1e6)))
+
+    def report(self, file=sys.stderr):
+        print("import time: self [us] | cumulative | imported package", file=file)
+        for depth, name, own, total in self.rows:
+            print(f"import time: {own:>9} | {total:>10} | {'  ' * depth}{name}", file=file)
+
+
+class TimedLoader:
+    """Wraps a module loader so ImportTimer sees how long the module takes"""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.timer.timed(module.__name__, lambda: self.loader.exec_module(module))
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class QuizLauncher:
+    def __init__(self, root, importtime=False):
+        self.root = root
+        self.root.title("Quizzes")
+        self.timer = ImportTimer() if importtime else None
+        self.marks = []  # (event, seconds since STARTED)
+        self.app = None
+        self.frame = tk.Frame(root)
+        self.frame.pack(padx=40, pady=30)
+
+    def mark(self, event):
+        self.marks.append((event, time.perf_counter() - STARTED))
+
+    def show_menu(self):
+        tk.Label(self.frame, text="Choose a quiz", font=("Arial", 16, "bold")).pack(pady=10)
+        for name, (_, _, text) in QUIZZES.items():
+            tk.Button(self.frame, text=text, width=20, font=("Arial", 14),
+                      command=lambda name=name: self.open(name)).pack(pady=5)
+
+    def open(self, name):
+        self.show_loading(name)
+        self.load(name)
+
+    def show_loading(self, name):
+        for widget in self.frame.winfo_children():
+            widget.destroy()
+        tk.Label(self.frame, text=f"Loading {QUIZZES[name][2]}...", font=("Arial", 14)).pack(pady=10)
+
+    def load(self, name):
+        """Import the quiz's module off the Tk thread, then build the app on it"""
+        module_name, class_name, text = QUIZZES[name]
+        result = {}
+
+        def run_import():
+            try:
+                if self.timer is not None:
+                    with self.timer:
+                        result["module"] = importlib.import_module(module_name)
+                else:
+                    result["module"] = importlib.import_module(module_name)
+            except BaseException as error:
+                result["error"] = error
+
+        loader = threading.Thread(target=run_import, daemon=True)
+        loader.start()
+        self.wait_for_import(loader, result, class_name, text)
+
+    def wait_for_import(self, loader, result, class_name, text):
+        if loader.is_alive():
+            self.root.after(POLL_MS, self.wait_for_import, loader, result, class_name, text)
+            return
+        if "error" in result:
+            # Raising here would only reach Tk's error handler and leave the
+            # window on "Loading..."; say what failed and offer the menu again
+            error = result["error"]
+            messagebox.showerror("Could not open quiz", f"{text} failed to load:\n{type(error).__name__}: {error}")
+            for widget in self.frame.winfo_children():
+                widget.destroy()
+            self.show_menu()
+            return
+        self.mark(f"{text} imported")
+        self.frame.destroy()
+        self.app = getattr(result["module"], class_name)(self.root)
+        if hasattr(self.app, "close"):
+            self.root.protocol("WM_DELETE_WINDOW", self.app.close)
+        self.root.update_idletasks()
+        self.mark(f"{text} ready")
+        if self.timer is not None:
+            self.report()
+
+    def report(self, file=sys.stderr):
+        self.timer.report(file)
+        for event, seconds in self.marks:
+            print(f"{event}: {seconds * 1000:.1f} ms", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("quiz", nargs="?", choices=sorted(QUIZZES), help="open this quiz without the menu")
+    parser.add_argument("--importtime", action="store_true",
+                        help="print import times and time to first window on stderr")
+    args = parser.parse_args(argv)
+
+    root = tk.Tk()
+    launcher = QuizLauncher(root, args.importtime)
+    if args.quiz:
+        launcher.show_loading(args.quiz)
+    else:
+        launcher.show_menu()
+    root.update()
+    launcher.mark("first window")
+    if args.quiz:
+        launcher.load(args.quiz)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,11 @@ class RecurrenceQuestion(ABC):
         self.options = []
         self.correct_answer = ""
         self.difficulty = 1  # 1-5 scale
+        # What the question is about, for checking it numerically:
+        # recurrence (a, b, p, q) is T(n) = aT(n/b) + n^p log^q n and growth
+        # (e, g) is the answer's Θ(n^e log^g n), None if it gives no bound
+        self.recurrence = None
+        self.growth = None
         self.generate_question()
     
     @abstractmethod
@@ -39,13 +44,19 @@ class MasterTheoremQuestion(RecurrenceQuestion):
             f_exp = math.log(a, b) - random.uniform(0.1, 0.5)
             f_n = f"n^{f_exp:.1f}"
             complexity = f"Θ(n^{math.log(a, b):.3f})"
+            self.recurrence = (a, b, round(f_exp, 1), 0)
+            self.growth = (round(math.log(a, b), 3), 0)
         elif case == 2:  # Case 2: f(n) = Θ(n^log_b(a))
             f_n = f"n^{math.log(a, b):.1f} log n"
             complexity = f"Θ(n^{math.log(a, b):.3f} log n)"
+            self.recurrence = (a, b, round(math.log(a, b), 1), 1)
+            self.growth = (round(math.log(a, b), 3), 1)
         else:  # Case 3: f(n) = Ω(n^log_b(a+ε))
             f_exp = math.log(a, b) + random.uniform(0.1, 0.5)
             f_n = f"n^{f_exp:.1f}"
             complexity = f"Θ({f_n})"
+            self.recurrence = (a, b, round(f_exp, 1), 0)
+            self.growth = (round(f_exp, 1), 0)
         
         self.question = f"""Consider the recurrence relation:
 T(n) = {a}T(n/{b}) + {f_n}
@@ -74,18 +85,20 @@ T(n) = {a}T(n/{b}) + Θ(n^{k})
         
 What is the total work at each level and the number of levels?"""
         
-        # Calculate correct values
-        levels = math.log(1, b)  # Simplified for example
+        # Calculate correct values; the tree has log_b n levels below the root
+        levels = f"log_{b} n"
         work_per_level = f"a^i * (n/b^i)^{k}"
         total_work = f"Θ(n^{k} log n)" if k == math.log(a, b) else f"Θ(n^{max(k, math.log(a, b))})"
+        self.recurrence = (a, b, k, 0)
+        self.growth = (k, 1) if k == math.log(a, b) else (max(k, math.log(a, b)), 0)
         
         # Generate options
         self.options = [
-            f"{levels:.1f} levels, {work_per_level} work per level, {total_work} total",
-            f"{levels:.1f} levels, constant work, Θ(log n) total",
+            f"{levels} levels, {work_per_level} work per level, {total_work} total",
+            f"{levels} levels, constant work, Θ(log n) total",
             f"n levels, n work per level, Θ(n²) total",
             "Cannot be determined",
-            f"{levels:.1f} levels, {work_per_level} work per level, Θ(n) total"
+            f"{levels} levels, {work_per_level} work per level, Θ(n) total"
         ]
         self.correct_answer = self.options[0]
 
@@ -100,12 +113,17 @@ subproblems each of size n/2 and spends {work} time on the divide/combine steps.
 What is the recurrence relation and its solution?"""
         
         # Calculate solution
+        p, q = {"n": (1, 0), "n²": (2, 0), "n log n": (1, 1), "1": (0, 0)}[work]
+        self.recurrence = (parts, 2, p, q)
         if work == "n":
             solution = "Θ(n log n)" if parts == 2 else f"Θ(n^{math.log(parts, 2)})"
+            self.growth = (1, 1) if parts == 2 else (math.log(parts, 2), 0)
         elif work == "n²":
             solution = "Θ(n²)"
+            self.growth = (2, 0)
         else:
             solution = f"Θ({work} log n)" if parts == 2 else "Varies"
+            self.growth = (p, q + 1) if parts == 2 else None
         
         self.options = [
             f"T(n) = {parts}T(n/2) + Θ({work}); {solution}",
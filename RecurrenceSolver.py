@@ -0,0 +1,151 @@
+"""Numeric check of the answers the recurrence questions give.
+
+Every generated question records its recurrence T(n) = aT(n/b) + n^p
+log^q n and the growth Θ(n^e log^g n) its answer claims. The solver
+evaluates T along the chain n = 1, b, b^2, ..., b^LEVELS, each value
+built from the one before it, in log space so n can go far past the
+float range. The local slope of log T against log n tends to
+e + g / ln n, so a straight-line fit of the slopes against 1 / ln n
+over the top half of the chain gives e as the intercept and g as the
+slope; a quadratic term in 1 / ln n takes up what lower-order terms
+leave. Questions are solved many at once as NumPy arrays, and batches
+are spread over worker processes.
+
+    python RecurrenceSolver.py --count 50000 --show 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from RecurrenceQuestion import RecurrenceQuestionFactory
+
+LEVELS = 2000  # Chain length; lower-order terms are gone long before n = 2^2000
+EXPONENT_TOLERANCE = 0.01
+LOG_POWER_TOLERANCE = 0.25
+GROUP_SIZE = 500  # Most questions handed to a worker at once
+
+
+def log_chain(a, b, p, q, levels=LEVELS):
+    """ln T(b^j) for j = 0..levels, one row per recurrence, with T(1) = 1"""
+    a, b, p, q = (np.asarray(x, dtype=np.float64) for x in (a, b, p, q))
+    # Level by level down the columns, so each step works on a contiguous row
+    ln_n = np.arange(1, levels + 1)[:, None] * np.log(b)
+    ln_f = p * ln_n + q * np.log(ln_n)
+    ln_a = np.log(a)
+    ln_t = np.zeros((levels + 1, len(ln_a)))
+    for j in range(1, levels + 1):
+        np.logaddexp(ln_a + ln_t[j - 1], ln_f[j - 1], out=ln_t[j])
+    return ln_t.T
+
+
+def fit_growth(b, ln_t, tail=0.5):
+    """(e, g) arrays such that T grows like n^e log^g n, from log_chain rows"""
+    levels = ln_t.shape[1] - 1
+    first = max(int(levels * (1 - tail)), 1)
+    ln_b = np.log(np.asarray(b, dtype=np.float64))[:, None]
+    j = np.arange(first, levels + 1)
+    slope = np.diff(ln_t[:, first - 1:], axis=1) / ln_b
+    x = 1 / (j * ln_b)
+    # Least squares of slope = e + g x + h x^2, all rows at once; the x^2
+    # term soaks up the 1 / ln^2 n left when f is only just above n^log_b a.
+    # x is scaled to [1/2, 1] to keep the normal equations well conditioned
+    scale = x[:, :1]
+    u = x / scale
+    powers = [np.ones_like(u), u, u * u, u ** 3, u ** 4]
+    moments = [power.sum(axis=1) for power in powers]
+    normal = np.stack([np.stack(moments[i:i + 3], axis=1) for i in range(3)], axis=1)
+    rhs = np.stack([(power * slope).sum(axis=1) for power in powers[:3]], axis=1)
+    coef = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    return coef[:, 0], coef[:, 1] / scale[:, 0]
+
+
+def solve(recurrences, levels=LEVELS):
+    """[(e, g)] for a list of (a, b, p, q)"""
+    if not recurrences:
+        return []
+    a, b, p, q = zip(*recurrences)
+    e, g = fit_growth(b, log_chain(a, b, p, q, levels))
+    return list(zip(e.tolist(), g.tolist()))
+
+
+def matches(growth, solved):
+    """Whether a claimed (e, g) agrees with a solved one"""
+    if growth is None:
+        return False
+    return (abs(growth[0] - solved[0]) <= EXPONENT_TOLERANCE
+            and abs(growth[1] - solved[1]) <= LOG_POWER_TOLERANCE)
+
+
+def _check_group(items):
+    solved = solve([recurrence for recurrence, _ in items])
+    return [{"recurrence": list(recurrence), "claimed": None if growth is None else list(growth),
+             "exponent": round(e, 4), "log_power": round(g, 2), "ok": matches(growth, (e, g))}
+            for (recurrence, growth), (e, g) in zip(items, solved)]
+
+
+def check_batch(items, processes=None):
+    """Check many (recurrence, growth) pairs, in input order.
+
+    With processes=1 everything runs in this process.
+    """
+    jobs = [items[start:start + GROUP_SIZE] for start in range(0, len(items), GROUP_SIZE)]
+    if processes == 1 or len(jobs) < 2:
+        checked = list(map(_check_group, jobs))
+    else:
+        workers = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as executor:
+            checked = list(executor.map(_check_group, jobs,
+                                        chunksize=max(1, len(jobs) // (4 * workers))))
+    return [result for group in checked for result in group]
+
+
+def check_questions(questions, processes=None):
+    """check_batch for RecurrenceQuestion objects, each result naming its type"""
+    results = check_batch([(question.recurrence, question.growth) for question in questions], processes)
+    for question, result in zip(questions, results):
+        result["type"] = type(question).__name__
+    return results
+
+
+def describe(result):
+    a, b, p, q = result["recurrence"]
+    claimed = result["claimed"]
+    claim = "no bound" if claimed is None else f"n^{claimed[0]:.3f} log^{claimed[1]} n"
+    return (f"{result['type']}: T(n) = {a}T(n/{b}) + n^{p} log^{q} n claims {claim}, "
+            f"solves to n^{result['exponent']:.3f} log^{result['log_power']:.2f} n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10**4, help="questions to generate and check")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--show", type=int, default=0, help="print this many wrong questions")
+    parser.add_argument("--output", help="write every result here as JSON")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    questions = [RecurrenceQuestionFactory.create_question() for _ in range(args.count)]
+    results = check_questions(questions, args.processes)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+            f.write("\n")
+    totals = Counter(result["type"] for result in results)
+    wrong = Counter(result["type"] for result in results if not result["ok"])
+    for name in sorted(totals):
+        print(f"{name:<24} {wrong[name]:>7} wrong of {totals[name]:>7}")
+    for result in [result for result in results if not result["ok"]][:args.show]:
+        print(describe(result))
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Uniform grid for nearest-point queries within a fixed radius."""
+from collections import defaultdict
+
+
+class SpatialGrid:
+    """Points bucketed into square cells as wide as the search radius.
+
+    A point within radius of (x, y) can only lie in the cell holding
+    (x, y) or one of its eight neighbours, so nearest() looks at nine
+    buckets however many points there are.
+    """
+
+    def __init__(self, radius):
+        if radius <= 0:
+            raise ValueError("radius must be positive")
+        self.radius = radius
+        self.cells = defaultdict(list)
+        self.points = {}
+
+    def _cell(self, x, y):
+        return int(x // self.radius), int(y // self.radius)
+
+    def insert(self, item, x, y):
+        self.points[item] = (x, y)
+        self.cells[self._cell(x, y)].append(item)
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, x, y):
+        """Return the item closest to (x, y) within radius, or None"""
+        cx, cy = self._cell(x, y)
+        best = None
+        best_dist = self.radius * self.radius
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for item in self.cells.get((i, j), ()):
+                    px, py = self.points[item]
+                    dist = (px - x) ** 2 + (py - y) ** 2
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = item
+        return best
@@ -0,0 +1,112 @@
+"""Reingold–Tilford tidy layout of binary trees, with cached subtree contours."""
+
+
+class TidyLayout:
+    """Places the nodes of a binary tree so that no two overlap.
+
+    Each subtree is laid out once relative to its own root: the children
+    sit at -offset and +offset, where offset is the smallest that keeps the
+    left subtree's right contour (its rightmost x per depth) at least
+    separation away from the right subtree's left contour. The contours and
+    the subtree's extent are cached per node, so after an update only the
+    nodes the tree reports through AVLTree.watch() are laid out again.
+    Combining two subtrees walks only the shorter contour, which makes a
+    full layout O(n) for a balanced tree.
+
+    Positions are in layout units: x with the root at 0, where adjacent
+    nodes on a level are at least separation apart, and y is the depth.
+    """
+
+    def __init__(self, separation=1.0):
+        self.separation = separation
+        # node -> (offset, left contour, right contour, leftmost, rightmost);
+        # contour[d] is the x of the subtree's outermost node d levels down,
+        # all relative to node
+        self.cache = {}
+
+    def invalidate(self, nodes):
+        """Forget the layout of subtrees whose shape changed"""
+        if self.cache:
+            for node in nodes:
+                self.cache.pop(node, None)
+
+    def clear(self):
+        self.cache.clear()
+
+    def measure(self, root):
+        """Lay out every subtree of root that is not cached yet"""
+        cache = self.cache
+        if root is None or root in cache:
+            return
+        half = self.separation / 2
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                for child in (node.right, node.left):
+                    if child is not None and child not in cache:
+                        stack.append((child, False))
+                continue
+
+            left = cache[node.left] if node.left is not None else None
+            right = cache[node.right] if node.right is not None else None
+            if left is None and right is None:
+                cache[node] = (0, (0,), (0,), 0, 0)
+                continue
+            if left is None or right is None:
+                # Single child: keep it on its own side of the parent
+                offset = half
+                _, lc, rc, lo, hi = left or right
+                shift = -offset if right is None else offset
+                cache[node] = (offset, (0,) + tuple(x + shift for x in lc),
+                               (0,) + tuple(x + shift for x in rc),
+                               min(0, lo + shift), max(0, hi + shift))
+                continue
+
+            # Closest approach of the facing contours over the shared depths
+            _, llc, lrc, llo, _ = left
+            _, rlc, rrc, _, rhi = right
+            gap = max(a - b for a, b in zip(lrc, rlc))
+            offset = max(gap + self.separation, self.separation) / 2
+            lc = (0,) + tuple(x - offset for x in llc) + tuple(x + offset for x in rlc[len(llc):])
+            rc = (0,) + tuple(x + offset for x in rrc) + tuple(x - offset for x in lrc[len(rrc):])
+            cache[node] = (offset, lc, rc, llo - offset, rhi + offset)
+
+    def extent(self, node):
+        """(leftmost x, rightmost x, height) of node's subtree, relative to node"""
+        self.measure(node)
+        _, lc, _, lo, hi = self.cache[node]
+        return lo, hi, len(lc)
+
+    def positions(self, root, viewport=None):
+        """Return {node: (x, depth)}, optionally only for nodes inside viewport.
+
+        viewport is (x0, depth0, x1, depth1) in layout units; subtrees that
+        lie entirely outside it are skipped without being visited.
+        """
+        result = {}
+        if root is None:
+            return result
+        self.measure(root)
+        cache = self.cache
+        if viewport is not None:
+            x0, d0, x1, d1 = viewport
+        stack = [(root, 0, 0)]
+        while stack:
+            node, x, depth = stack.pop()
+            offset, lc, _, lo, hi = cache[node]
+            if viewport is not None:
+                if depth > d1 or depth + len(lc) - 1 < d0:
+                    continue
+                if x + hi < x0 or x + lo > x1:
+                    continue
+                if x0 <= x <= x1 and d0 <= depth:
+                    result[node] = (x, depth)
+            else:
+                result[node] = (x, depth)
+            if node.left is not None:
+                stack.append((node.left, x - offset, depth + 1))
+            if node.right is not None:
+                stack.append((node.right, x + offset, depth + 1))
+        return result
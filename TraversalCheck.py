@@ -0,0 +1,187 @@
+"""Check a player's traversal order against a CSRGraph, one click at a time.
+
+A graph usually has many valid DFS (or BFS) orders, one for every way of
+breaking ties between unvisited neighbours, so listing them to compare
+against is exponential. The checkers here instead replay the traversal
+the player claims: each click is accepted if some traversal could visit
+that node next, in amortised O(degree) time, and a whole order is
+checked in O(n + m). With strict=True the ties must be broken towards
+the smaller node, as CSRGraph.dfs and CSRGraph.bfs do.
+
+Both checkers advance a pointer per node through its sorted neighbour
+list past visited nodes, so the first unvisited neighbour is always at
+the pointer; every pointer move is logged so that pop() can undo a click.
+"""
+from array import array
+from bisect import bisect_left
+
+
+class _OrderChecker:
+    """Shared state of the DFS and BFS checkers"""
+
+    def __init__(self, graph, start, strict=False):
+        self.graph = graph
+        self.start = start
+        self.strict = strict
+        self.visited = bytearray(len(graph))
+        self.pointer = array("q", graph.indptr[:-1])
+        self.order = []
+        self.history = []  # per accepted click: what pop() must restore
+        self.bad = None  # index of the first rejected click
+        # Counted once so that complete() is O(1) after every click
+        self.reachable = len(graph.bfs(start))
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def valid(self):
+        """Whether every click so far could start a traversal"""
+        return self.bad is None
+
+    def _first_unvisited(self, u, changes):
+        """Advance u's pointer past visited neighbours; None if it has none left"""
+        indptr, indices, visited = self.graph.indptr, self.graph.indices, self.visited
+        p, end = self.pointer[u], indptr[u + 1]
+        while p < end and visited[indices[p]]:
+            p += 1
+        if p != self.pointer[u]:
+            changes.append((u, self.pointer[u]))
+            self.pointer[u] = p
+        return indices[p] if p < end else None
+
+    def _can_visit(self, u, v, first):
+        """Whether v may be visited next from u, whose first unvisited neighbour is first"""
+        if self.strict:
+            return v == first
+        indices = self.graph.indices
+        lo, hi = self.graph.indptr[u], self.graph.indptr[u + 1]
+        i = bisect_left(indices, v, lo, hi)
+        return i < hi and indices[i] == v and not self.visited[v]
+
+    def _restore(self, changes):
+        for u, p in reversed(changes):
+            self.pointer[u] = p
+
+    def push(self, v):
+        """Record a click on node v; True if the order is still valid"""
+        if self.bad is None:
+            if self.order:
+                accepted = self._accept(v)
+            else:
+                accepted = v == self.start
+                if accepted:
+                    self._begin(v)
+            if accepted:
+                self.visited[v] = 1
+                self.order.append(v)
+                return True
+            self.bad = len(self.order)
+        self.order.append(v)
+        return False
+
+    def pop(self):
+        """Undo the last click and return its node"""
+        v = self.order.pop()
+        if self.bad is not None:
+            if self.bad == len(self.order):
+                self.bad = None
+            return v
+        self.visited[v] = 0
+        self._undo(v, self.history.pop())
+        return v
+
+    def extend(self, nodes):
+        """Push every node; True if the order is still valid"""
+        for v in nodes:
+            self.push(v)
+        return self.valid
+
+    def complete(self):
+        """Whether the clicks are a whole valid order, every reachable node included"""
+        return self.valid and len(self.order) == self.reachable
+
+
+class DFSOrderChecker(_OrderChecker):
+    """Accepts exactly the visit orders of a depth-first search from start.
+
+    The path from start to the node being explored is kept as a stack. A
+    click on v pops the nodes with no unvisited neighbour left, then v
+    must be an unvisited neighbour of the node on top.
+    """
+
+    def _begin(self, v):
+        self.path = [v]
+        self.history.append(([], []))
+
+    def _accept(self, v):
+        path = self.path
+        popped, changes = [], []
+        first = None
+        while path:
+            first = self._first_unvisited(path[-1], changes)
+            if first is not None:
+                break
+            popped.append(path.pop())
+        if path and self._can_visit(path[-1], v, first):
+            path.append(v)
+            self.history.append((popped, changes))
+            return True
+        path.extend(reversed(popped))
+        self._restore(changes)
+        return False
+
+    def _undo(self, v, entry):
+        popped, changes = entry
+        self.path.pop()
+        self.path.extend(reversed(popped))
+        self._restore(changes)
+
+
+class BFSOrderChecker(_OrderChecker):
+    """Accepts exactly the visit orders of a breadth-first search from start.
+
+    The order itself is the queue. A click on v moves the head past nodes
+    with no unvisited neighbour left, then v must be an unvisited
+    neighbour of the head.
+    """
+
+    def _begin(self, v):
+        self.head = 0
+        self.history.append((0, []))
+
+    def _accept(self, v):
+        head, changes = self.head, []
+        first = None
+        while self.head < len(self.order):
+            first = self._first_unvisited(self.order[self.head], changes)
+            if first is not None:
+                break
+            self.head += 1
+        if self.head < len(self.order) and self._can_visit(self.order[self.head], v, first):
+            self.history.append((head, changes))
+            return True
+        self.head = head
+        self._restore(changes)
+        return False
+
+    def _undo(self, v, entry):
+        self.head, changes = entry
+        self._restore(changes)
+
+
+def is_dfs_order(graph, order, start=None, strict=False):
+    """Whether order is a complete DFS visit order of graph from start (default order[0])"""
+    return _check(DFSOrderChecker, graph, order, start, strict)
+
+
+def is_bfs_order(graph, order, start=None, strict=False):
+    """Whether order is a complete BFS visit order of graph from start (default order[0])"""
+    return _check(BFSOrderChecker, graph, order, start, strict)
+
+
+def _check(checker_class, graph, order, start, strict):
+    if not order:
+        return False
+    checker = checker_class(graph, order[0] if start is None else start, strict)
+    return checker.extend(order) and checker.complete()
@@ -0,0 +1,133 @@
+"""Text rendering of binary trees, streamed one line at a time."""
+import sys
+
+
+class TreeRenderer:
+    """Draws a tree of nodes with key/left/right/height as ASCII art.
+
+    Every subtree is laid out once as (width, column of its root) and the
+    layout is cached per node. The owning tree calls invalidate() with the
+    nodes an update touched, so after an insert, delete or rotation only
+    that path is laid out again. Output is produced level by level and
+    each line is joined exactly once from its segments, instead of
+    concatenating every subtree's lines into its parent's at each level.
+    """
+
+    def __init__(self, cached=True):
+        self.cache = {} if cached else None
+
+    def invalidate(self, nodes):
+        """Forget the layout of nodes whose subtree or label changed"""
+        if self.cache:
+            for node in nodes:
+                self.cache.pop(node, None)
+
+    def clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    @staticmethod
+    def label(node):
+        return f"{node.key}({node.height})"
+
+    def layout(self, root, max_depth=None):
+        """Return {node: (width, middle, label)} for every node that will be drawn"""
+        if self.cache is not None and max_depth is None:
+            layout = self.cache
+        else:
+            layout = {}
+
+        # Post-order walk that skips subtrees whose layout is still cached
+        stack = [(root, 0, False)]
+        while stack:
+            node, depth, expanded = stack.pop()
+            show_children = max_depth is None or depth + 1 < max_depth
+            if not expanded:
+                if node in layout:
+                    continue
+                stack.append((node, depth, True))
+                if show_children:
+                    if node.right is not None:
+                        stack.append((node.right, depth + 1, False))
+                    if node.left is not None:
+                        stack.append((node.left, depth + 1, False))
+                continue
+
+            left = node.left if show_children else None
+            right = node.right if show_children else None
+            n = layout[left][0] if left is not None else 0
+            m = layout[right][0] if right is not None else 0
+            s = self.label(node)
+            u = len(s)
+            layout[node] = (n + m + u, n + u // 2, s)
+        return layout
+
+    def lines(self, root, max_depth=None, max_width=None):
+        """Yield the rendered lines, cut off below max_depth and past max_width"""
+        if root is None:
+            return
+        if max_depth is not None and max_depth < 1:
+            return
+        layout = self.layout(root, max_depth)
+        width = layout[root][0]
+        if max_width is not None:
+            width = min(width, max_width)
+
+        level = [(root, 0)]
+        depth = 0
+        while level:
+            show_children = max_depth is None or depth + 1 < max_depth
+            top = []
+            links = []
+            top_end = links_end = 0
+            below = []
+            # Boxes on one level are disjoint and visited left to right, so
+            # every segment is appended after the previous one
+            for node, offset in level:
+                s = layout[node][2]
+                left = node.left if show_children else None
+                right = node.right if show_children else None
+
+                n = 0
+                if left is not None:
+                    n, x, _ = layout[left]
+                    links.append(' ' * (offset + x - links_end))
+                    links.append('/')
+                    links_end = offset + x + 1
+                    top.append(' ' * (offset + x + 1 - top_end))
+                    top.append('_' * (n - x - 1))
+                    top_end = offset + n
+                    below.append((left, offset))
+                top.append(' ' * (offset + n - top_end))
+                top.append(s)
+                top_end = offset + n + len(s)
+                if right is not None:
+                    below.append((right, top_end))
+                    y = layout[right][1]
+                    top.append('_' * y)
+                    top_end += y
+                    links.append(' ' * (top_end - links_end))
+                    links.append('\\')
+                    links_end = top_end + 1
+
+            # Subtrees that start past the right edge are never visited
+            level = [item for item in below if item[1] < width]
+            yield _fit(top, top_end, width)
+            if level:
+                yield _fit(links, links_end, width)
+            depth += 1
+
+    def write(self, root, file=None, max_depth=None, max_width=None):
+        """Stream the rendered lines to file, stdout by default"""
+        file = file or sys.stdout
+        for line in self.lines(root, max_depth, max_width):
+            file.write(line)
+            file.write('\n')
+
+
+def _fit(parts, end, width):
+    """Join one line's segments and pad or clip it to width"""
+    if end > width:
+        return ''.join(parts)[:width]
+    parts.append(' ' * (width - end))
+    return ''.join(parts)